@@ -48,6 +48,52 @@ def comparator(account, logger=None, imported_ids=None, meta_key='import_id'):
     return cmp
 
 
+def _is_under(name, account):
+    # Assets:KrakenFutures isn't under Assets:Kraken.
+    return name == account or name.startswith(account + ':')
+
+
+def index_import_ids(entries, account, meta_key='import_id'):
+    """Index entries by the import ids of their postings under account.
+
+    Returns:
+      A pair of a dict of import id -> entry, and the list of the other
+      entries (without any such import id), to be matched the legacy way.
+    """
+    index = {}
+    others = []
+    for entry in entries:
+        found = False
+        for posting in getattr(entry, 'postings', ()):
+            if posting.meta and meta_key in posting.meta and _is_under(posting.account, account):
+                index[posting.meta[meta_key]] = entry
+                found = True
+        if not found:
+            others.append(entry)
+    return index, others
+
+
+def mark_duplicate_ids(entries, index, account, meta_key='import_id'):
+    """Mark entries whose postings under account all have a known import id.
+
+    Args:
+      entries: Incoming entries.
+      index: A dict of import id -> existing entry, see index_import_ids().
+    Returns:
+      The entries left unmarked.
+    """
+    remaining = []
+    for entry in entries:
+        ids = [posting.meta[meta_key] for posting in getattr(entry, 'postings', ())
+               if posting.meta and meta_key in posting.meta and _is_under(posting.account, account)]
+        if ids and all(import_id in index for import_id in ids):
+            # Mark similar to beangulp.extract.mark_duplicate_entries
+            entry.meta[DUPLICATE] = index[ids[0]]
+        else:
+            remaining.append(entry)
+    return remaining
+
+
 def warn_duplicate_import_id(account, existing, logger, meta_key='import_id'):
     """Log a warning if any import_id is encountered more than once in the existing entries."""
     found_import_ids = {}
@@ -0,0 +1,33 @@
+import functools
+import os
+
+
+def file_key(filepath):
+    """Return a key identifying the current contents of a file.
+
+    The key changes whenever the file is replaced or modified, so results
+    cached under it never outlive the file they were computed from.
+    """
+    st = os.stat(filepath)
+    return (os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+
+
+def per_file(maxsize=16):
+    """Decorator memoizing fn(filepath) by file_key(filepath).
+
+    Importers are instantiated once per account and each instance calls
+    identify() and extract() on the same documents. Wrapping the expensive
+    parse of a document with this shares one result between all of them.
+    The wrapped function gains a cache_clear() method.
+    """
+    def decorator(fn):
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(key):
+            return fn(key[0])
+
+        @functools.wraps(fn)
+        def wrapper(filepath):
+            return cached(file_key(filepath))
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
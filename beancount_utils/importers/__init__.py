@@ -10,3 +10,4 @@ import beancount_utils.importers.singlefin
 import beancount_utils.importers.transamerica_pdf
 import beancount_utils.importers.united_csv_claims
 import beancount_utils.importers.venmo_csv
+import beancount_utils.importers.wealthfront_cash_pdf
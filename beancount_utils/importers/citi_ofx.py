@@ -28,9 +28,6 @@ import logging
 import re
 
 from os import path
-from xml.sax import saxutils
-
-import bs4
 
 from beancount.core.number import D
 from beancount.core import amount
@@ -42,6 +39,9 @@ from beangulp import mimetypes
 from beangulp.extract import mark_duplicate_entries
 
 from beancount_utils.posting_deduplicator import PostingDeduplicator
+from beancount_utils.merge import merge_entries
+from beancount_utils.ofx import (
+    detect_encoding, find_acctids, find_max_date, find_statements, open_ofx, read_stmttrn)
 
 
 logger = logging.getLogger(__name__)
@@ -83,10 +83,9 @@ class Importer(beangulp.Importer):
             return False
 
         # Match the account id.
-        with open(filepath) as fd:
-            contents = fd.read()
-        return any(re.match(self.acctid_regexp, acctid)
-                   for acctid in find_acctids(contents))
+        with open_ofx(filepath) as contents:
+            acctids = find_acctids(contents)
+        return any(re.match(self.acctid_regexp, acctid) for acctid in acctids)
 
     def account(self, filepath):
         """Return the account against which we post transactions."""
@@ -99,17 +98,15 @@ class Importer(beangulp.Importer):
 
     def date(self, filepath):
         """Return the optional renamed account filename."""
-        with open(filepath) as fd:
-            contents = fd.read()
-        return find_max_date(contents)
+        with open_ofx(filepath) as contents:
+            return find_max_date(contents)
 
     def extract(self, filepath, existing):
         """Extract a list of partially complete transactions from the file."""
-        with open(filepath) as fd:
-            soup = bs4.BeautifulSoup(fd, 'lxml')
         self.pdup = PostingDeduplicator(self.importer_account, 'citi-ofx', logger)
-        entries = extract(soup, filepath, self.acctid_regexp, self.importer_account,
-                       flags.FLAG_WARNING, self.balance_type, self.ignore_membership, self.pdup)
+        with open_ofx(filepath) as contents:
+            entries = extract(contents, filepath, self.acctid_regexp, self.importer_account,
+                              flags.FLAG_WARNING, self.balance_type, self.ignore_membership, self.pdup)
         return entries
 
     def deduplicate(self, entries, existing):
@@ -120,11 +117,12 @@ class Importer(beangulp.Importer):
             self.decorator.decorate(entries)
 
 
-def extract(soup, filename, acctid_regexp, account, flag, balance_type, ignore_membership, pdup):
+def extract(contents, filename, acctid_regexp, account, flag, balance_type, ignore_membership, pdup):
     """Extract transactions from an OFX file.
 
     Args:
-      soup: A BeautifulSoup root node.
+      contents: A bytes-like object, the OFX file (see open_ofx()).
+      filename: The path of the OFX file.
       acctid_regexp: A regular expression string matching the account we're interested in.
       account: An account string onto which to post the amounts found in the file.
       flag: A single-character string.
@@ -133,10 +131,11 @@ def extract(soup, filename, acctid_regexp, account, flag, balance_type, ignore_m
     Returns:
       A sorted list of entries.
     """
-    new_entries = []
+    encoding = detect_encoding(contents)
+    streams = []
     imported_ids = set()
     counter = itertools.count()
-    for acctid, currency, transactions, balance in find_statement_transactions(soup):
+    for acctid, currency, transactions, balance in find_statements(contents, encoding):
         if not re.match(acctid_regexp, acctid):
             continue
 
@@ -144,17 +143,18 @@ def extract(soup, filename, acctid_regexp, account, flag, balance_type, ignore_m
         stmt_entries = []
         # Count transactions per date for input to import_id hash
         date_indices = {}
-        for stmttrn in transactions:
+        for span in transactions:
+            stmttrn = read_stmttrn(contents, span, encoding)
             if ignore_membership:
-                payee = find_child(stmttrn, 'name', saxutils.unescape)
-                amount_val = find_child(stmttrn, 'trnamt', D)
+                payee = stmttrn.payee
+                amount_val = stmttrn.number
                 if payee and amount_val is not None and 'MEMBERSHIP FEE' in payee and amount_val == D('0'):
                     continue
             entry = build_transaction(stmttrn, flag, account, currency, pdup)
             entry = entry._replace(meta=data.new_metadata(filename, next(counter)))
             stmt_entries.append(entry)
         stmt_entries = data.sorted(stmt_entries)
-        new_entries.extend(stmt_entries)
+        streams.append(stmt_entries)
 
         # Create a Balance directive.
         if balance and balance_type is not BalanceType.NONE:
@@ -170,155 +170,42 @@ def extract(soup, filename, acctid_regexp, account, flag, balance_type, ignore_m
             balance_entry = data.Balance(meta, date, account,
                                          amount.Amount(number, currency),
                                          None, None)
-            new_entries.append(balance_entry)
+            streams.append([balance_entry])
 
-    return data.sorted(new_entries)
+    return merge_entries(*streams)
 
 
 def get_date_index(stmttrn, date_indices):
-    date = parse_ofx_time(find_child(stmttrn, 'dtposted')).date()
+    date = stmttrn.date
     date_indices[date] = date_indices.get(date, 0) + 1
     return date_indices[date]
 
 
-def parse_ofx_time(date_str):
-    """Parse an OFX time string and return a datetime object.
-
-    Args:
-      date_str: A string, the date to be parsed.
-    Returns:
-      A datetime.datetime instance.
-    """
-    if len(date_str) < 14:
-        return datetime.datetime.strptime(date_str[:8], '%Y%m%d')
-    return datetime.datetime.strptime(date_str[:14], '%Y%m%d%H%M%S')
-
-
-def find_acctids(contents):
-    """Find the list of <ACCTID> tags.
-
-    Args:
-      contents: A string, the contents of the OFX file.
-    Returns:
-      A list of strings, the contents of the <ACCTID> tags.
-    """
-    # Match the account id. Don't bother parsing the entire thing as XML, just
-    # match the tag for this purpose. This'll work fine enough.
-    for match in re.finditer('<ACCTID>([^<]*)', contents):
-        yield match.group(1)
-
-
-def find_max_date(contents):
-    """Extract the report date from the file."""
-    soup = bs4.BeautifulSoup(contents, 'lxml')
-    dates = []
-    for ledgerbal in soup.find_all('ledgerbal'):
-        dtasof = ledgerbal.find('dtasof')
-        dates.append(parse_ofx_time(dtasof.contents[0]).date())
-    if dates:
-        return max(dates)
-
-
-def find_currency(soup):
-    """Find the first currency in the XML tree.
-
-    Args:
-      soup: A BeautifulSoup root node.
-    Returns:
-      A string, the first currency found in the file. Returns None if no currency
-      is found.
-    """
-    for stmtrs in soup.find_all(re.compile('.*stmtrs$')):
-        for currency_node in stmtrs.find_all('curdef'):
-            currency = currency_node.contents[0]
-            if currency is not None:
-                return currency
-
-
-def find_statement_transactions(soup):
-    """Find the statement transaction sections in the file.
-
-    Args:
-      soup: A BeautifulSoup root node.
-    Yields:
-      A trip of
-        An account id string,
-        A currency string,
-        A list of transaction nodes (<STMTTRN> BeautifulSoup tags), and
-        A (date, balance amount) for the <LEDGERBAL>.
-    """
-    # Process STMTTRNRS and CCSTMTTRNRS tags.
-    for stmtrs in soup.find_all(re.compile('.*stmtrs$')):
-        # For each CURDEF tag.
-        for currency_node in stmtrs.find_all('curdef'):
-            currency = currency_node.contents[0].strip()
-
-            # Extract ACCTID account information.
-            acctid_node = stmtrs.find('acctid')
-            if acctid_node:
-                acctid = next(acctid_node.children).strip()
-            else:
-                acctid = ''
-
-            # Get the LEDGERBAL node. There appears to be a single one for all
-            # transaction lists.
-            ledgerbal = stmtrs.find('ledgerbal')
-            balance = None
-            if ledgerbal:
-                dtasof = find_child(ledgerbal, 'dtasof', parse_ofx_time).date()
-                balamt = find_child(ledgerbal, 'balamt', D)
-                balance = (dtasof, balamt)
-
-            # Process transaction lists (regular or credit-card).
-            for tranlist in stmtrs.find_all(re.compile('(|bank|cc)tranlist')):
-                yield acctid, currency, tranlist.find_all('stmttrn'), balance
-
-
-def find_child(node, name, conversion=None):
-    """Find a child under the given node and return its value.
-
-    Args:
-      node: A <STMTTRN> bs4.element.Tag.
-      name: A string, the name of the child node.
-      conversion: A callable object used to convert the value to a new data type.
-    Returns:
-      A string, or None.
-    """
-    child = node.find(name)
-    if not child:
-        return None
-    value = child.contents[0].strip()
-    if conversion:
-        value = conversion(value)
-    return value
-
-
 def build_transaction(stmttrn, flag, account, currency, pdup):
     """Build a single transaction.
 
     Args:
-      stmttrn: A <STMTTRN> bs4.element.Tag.
+      stmttrn: A StmtTrn instance.
       flag: A single-character string.
       account: An account string, the account to insert.
       currency: A currency string.
     Returns:
       A Transaction instance.
     """
-    # Find the date.
-    date = parse_ofx_time(find_child(stmttrn, 'dtposted')).date()
+    date = stmttrn.date
 
-    payee = find_child(stmttrn, 'name', saxutils.unescape)
+    payee = stmttrn.payee
     # Save in meta as description, per statements
     description = payee
 
     # Add the transaction type to the description, unless it's not useful.
-    trntype = find_child(stmttrn, 'trntype', saxutils.unescape)
+    trntype = stmttrn.trntype
     if trntype in ('DEBIT', 'CREDIT'):
         trntype = None
 
     # Create a single posting for it; the user will have to manually categorize
     # the other side.
-    number = find_child(stmttrn, 'trnamt', D)
+    number = stmttrn.number
     units = amount.Amount(number, currency)
 
     posting_meta = {'description': description}
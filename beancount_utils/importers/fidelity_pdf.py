@@ -13,20 +13,25 @@ Account layout:
   Income (dividends):   {income_base}:{COMMODITY}
 
 To dump pages for importer development, use:
-  python -c "from beancount_utils.importers.fidelity_pdf import pdf_to_pages; \
-    print('\n\n===PAGE BREAK===\n\n'.join(pdf_to_pages('path/to/statement.pdf')))" > /tmp/fidelity_dump.txt
+  python -m beancount_utils.pdftext path/to/statement.pdf
+which writes path/to/statement.pdf.pages.txt. An importer created with
+text_backend="replay" reads that file like the PDF itself, without PDF
+decoding (see pdftext).
 """
+import abc
+import bisect
 import re
 from datetime import date, timedelta
 from decimal import Decimal
-
-import pdfplumber
+from typing import NamedTuple
 
 from beancount.core.data import Amount, Balance, Posting, Transaction, new_metadata
 from beancount.core.position import CostSpec
 import beangulp
 from beangulp import mimetypes
 
+from beancount_utils import pdfsniff, pdftext
+
 
 PERIOD_RE = re.compile(
     r"(January|February|March|April|May|June|July|August|September|October|"
@@ -83,17 +88,15 @@ def parse_period(text: str) -> tuple[date, date]:
     return start, end
 
 
-def pdf_to_pages(filepath: str) -> list[str]:
-    with pdfplumber.open(filepath) as pdf:
-        return [p.extract_text() or "" for p in pdf.pages]
+def pdf_to_pages(filepath: str, workers: int | None = None, backend: str = "pdfplumber") -> list[str]:
+    """Extract all pages, with `workers` processes for multi-page statements."""
+    return pdftext.get_pages(filepath, pdftext.backend(backend), workers=workers)
 
 
-def pdf_first_page(filepath: str) -> str:
+def pdf_first_page(filepath: str, backend: str = "pdfplumber") -> str:
     """Cheap text extraction for identify(); avoids reading the whole PDF."""
-    with pdfplumber.open(filepath) as pdf:
-        if not pdf.pages:
-            return ""
-        return pdf.pages[0].extract_text() or ""
+    pages = pdftext.get_pages(filepath, pdftext.backend(backend), [0])
+    return pages[0] if pages else ""
 
 
 def resolve_year(month: int, start: date, end: date) -> int:
@@ -102,220 +105,325 @@ def resolve_year(month: int, start: date, end: date) -> int:
     return start.year if month >= start.month else end.year
 
 
-def parse_holdings(pages: list[str]) -> dict[str, dict]:
-    """Return {ticker: {name, quantity, price, ending_value, is_core}}."""
-    holdings: dict[str, dict] = {}
-    in_holdings = False
-    section = None
+# Every line that opens or closes a section starts with one of these (the
+# dividends heading is matched anywhere in the line). Other lines can't change
+# the parser state and only go to the sections that are open.
+HEADING_RE = re.compile(
+    r"Holdings$|Activity|Estimated Cash Flow|Total|Additional Information|"
+    r"Deposits|Withdrawals$|Core Fund Activity|Securities Bought|"
+    r"Trades Pending Settlement|Dividends, Interest"
+)
+DIVIDENDS_HEADING = "Dividends, Interest & Other Income"
 
-    for text in pages:
-        lines = text.splitlines()
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if line == "Holdings":
-                in_holdings = True
-                i += 1
-                continue
-            if in_holdings and (
-                line.startswith("Activity")
-                or line.startswith("Estimated Cash Flow")
-                or line.startswith("Total Holdings")
-                or line.startswith("Additional Information")
-            ):
-                in_holdings = False
-            if not in_holdings:
-                i += 1
-                continue
-
-            if line.startswith("Core Account") and "Total" not in line:
-                section = "core"
-            elif line.startswith("Exchange Traded Products") and "Total" not in line:
-                section = "etp"
-            elif line.startswith(("Stocks", "Mutual Funds", "Bonds", "Options", "Other")) and "Total" not in line:
-                section = "other"
-
-            if line.startswith("Total"):
-                i += 1
-                continue
-
-            m = HOLDING_DATA_RE.search(line)
-            if not m:
-                i += 1
-                continue
-
-            name = line[: m.start()].strip()
-            if not name or name.startswith("$"):
-                i += 1
-                continue
-
-            ticker = None
-            tm = TICKER_RE.search(line)
-            if tm:
-                ticker = tm.group(1)
-            elif i + 1 < len(lines):
-                tm2 = TICKER_RE.search(lines[i + 1])
-                if tm2:
-                    ticker = tm2.group(1)
-                    extra = lines[i + 1].strip().split("(")[0].strip()
-                    if extra:
-                        name = f"{name} {extra}".strip()
-
-            if ticker:
-                begin_mv, qty, price, ending_mv = m.groups()
-                holdings[ticker] = {
-                    "name": name,
-                    "quantity": to_decimal(qty),
-                    "price": to_decimal(price),
-                    "ending_value": to_decimal(ending_mv),
-                    "is_core": section == "core",
-                }
-            i += 1
-
-    return holdings
-
-
-def parse_dividends(pages: list[str], start: date, end: date) -> list[dict]:
-    out: list[dict] = []
-    in_section = False
-    pending_name_tail = None
 
-    for text in pages:
-        for line in text.splitlines():
-            stripped = line.strip()
-            if "Dividends, Interest & Other Income" in stripped and not stripped.startswith("Total"):
-                in_section = True
-                continue
-            if in_section and (
-                stripped.startswith("Total Dividends")
-                or stripped.startswith("Deposits")
-                or stripped.startswith("Core Fund Activity")
-                or stripped.startswith("Securities Bought")
-            ):
-                in_section = False
-            if not in_section:
-                continue
-
-            m = DIVIDEND_RE.match(stripped)
-            if m:
-                mm_dd, name, _cusip, amount = m.groups()
-                month, day = (int(x) for x in mm_dd.split("/"))
-                year = resolve_year(month, start, end)
-                out.append({
-                    "date": date(year, month, day),
-                    "name": name.strip(),
-                    "amount": to_decimal(amount),
-                })
-                pending_name_tail = out[-1]
-                continue
-
-            # Wrapped name continuation (e.g. "MARKET" on its own line)
-            if (
-                pending_name_tail
-                and stripped
-                and not stripped[0].isdigit()
-                and not stripped.startswith("Total")
-                and stripped == stripped.upper()
-                and len(stripped.split()) <= 3
-            ):
-                pending_name_tail["name"] = f"{pending_name_tail['name']} {stripped}".strip()
-            pending_name_tail = None
+class Statement(NamedTuple):
+    start: date
+    end: date
+    holdings: dict[str, dict]
+    dividends: list[dict]
+    trades: list[dict]
+    transfers: list[dict]
 
-    return out
 
+class _Section(abc.ABC):
+    """State of one statement section while the pages are traversed.
 
-def parse_trades(pages: list[str], start: date, end: date) -> list[dict]:
-    out: list[dict] = []
-    in_section = False
-    for text in pages:
-        for line in text.splitlines():
-            stripped = line.strip()
-            if stripped.startswith("Securities Bought") or stripped.startswith(
-                "Trades Pending Settlement"
-            ):
-                in_section = True
-                continue
-            if in_section and (
-                stripped.startswith("Total Securities")
-                or stripped.startswith("Dividends, Interest")
-                or stripped.startswith("Core Fund Activity")
-                or stripped.startswith("Deposits")
-            ):
-                in_section = False
-            if not in_section:
-                continue
-            m = TRADE_RE.match(stripped)
-            if not m:
-                continue
-            mm_dd, name, _cusip, side, qty, price, amount = m.groups()
-            month, day = (int(x) for x in mm_dd.split("/"))
-            out.append({
-                "date": date(resolve_year(month, start, end), month, day),
-                "name": name.strip(),
-                "side": side,
+    heading() sees every heading line and returns True if the line opened
+    the section; row() sees the other lines while the section is open. Rows
+    are dated with (month, day) until the statement period is known.
+    """
+    active = False
+
+    @abc.abstractmethod
+    def heading(self, line: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def row(self, line: str, next_line: str | None) -> None:
+        ...
+
+
+class _Holdings(_Section):
+    """Rows become {ticker: {name, quantity, price, ending_value, is_core}}."""
+
+    def __init__(self):
+        self.rows: dict[str, dict] = {}
+        self.section = None
+
+    def heading(self, line):
+        if line == "Holdings":
+            self.active = True
+            return True
+        if self.active and line.startswith(
+            ("Activity", "Estimated Cash Flow", "Total Holdings", "Additional Information")
+        ):
+            self.active = False
+        return False
+
+    def row(self, line, next_line):
+        if line.startswith("Core Account") and "Total" not in line:
+            self.section = "core"
+        elif line.startswith("Exchange Traded Products") and "Total" not in line:
+            self.section = "etp"
+        elif line.startswith(("Stocks", "Mutual Funds", "Bonds", "Options", "Other")) and "Total" not in line:
+            self.section = "other"
+
+        if line.startswith("Total"):
+            return
+
+        m = HOLDING_DATA_RE.search(line)
+        if not m:
+            return
+
+        name = line[: m.start()].strip()
+        if not name or name.startswith("$"):
+            return
+
+        ticker = None
+        tm = TICKER_RE.search(line)
+        if tm:
+            ticker = tm.group(1)
+        elif next_line is not None:
+            tm2 = TICKER_RE.search(next_line)
+            if tm2:
+                ticker = tm2.group(1)
+                extra = next_line.strip().split("(")[0].strip()
+                if extra:
+                    name = f"{name} {extra}".strip()
+
+        if ticker:
+            begin_mv, qty, price, ending_mv = m.groups()
+            self.rows[ticker] = {
+                "name": name,
                 "quantity": to_decimal(qty),
                 "price": to_decimal(price),
+                "ending_value": to_decimal(ending_mv),
+                "is_core": self.section == "core",
+            }
+
+
+class _Dividends(_Section):
+
+    def __init__(self):
+        self.rows: list[dict] = []
+        self.pending_name_tail = None
+
+    def heading(self, line):
+        if DIVIDENDS_HEADING in line and not line.startswith("Total"):
+            self.active = True
+            return True
+        if self.active and line.startswith(
+            ("Total Dividends", "Deposits", "Core Fund Activity", "Securities Bought")
+        ):
+            self.active = False
+        return False
+
+    def row(self, line, next_line):
+        m = DIVIDEND_RE.match(line)
+        if m:
+            mm_dd, name, _cusip, amount = m.groups()
+            self.rows.append({
+                "date": month_day(mm_dd),
+                "name": name.strip(),
                 "amount": to_decimal(amount),
             })
-    return out
-
-
-def parse_transfers(pages: list[str], start: date, end: date) -> list[dict]:
-    """Parse the Deposits and Withdrawals sections.
-
-    Returns dicts with {date, description, amount} where amount is signed:
-    positive for deposits (cash in), negative for withdrawals (cash out).
+            self.pending_name_tail = self.rows[-1]
+            return
+
+        # Wrapped name continuation (e.g. "MARKET" on its own line)
+        pending = self.pending_name_tail
+        if (
+            pending
+            and line
+            and not line[0].isdigit()
+            and not line.startswith("Total")
+            and line == line.upper()
+            and len(line.split()) <= 3
+        ):
+            pending["name"] = f"{pending['name']} {line}".strip()
+        self.pending_name_tail = None
+
+
+class _Trades(_Section):
+
+    def __init__(self):
+        self.rows: list[dict] = []
+
+    def heading(self, line):
+        if line.startswith(("Securities Bought", "Trades Pending Settlement")):
+            self.active = True
+            return True
+        if self.active and line.startswith(
+            ("Total Securities", "Dividends, Interest", "Core Fund Activity", "Deposits")
+        ):
+            self.active = False
+        return False
+
+    def row(self, line, next_line):
+        m = TRADE_RE.match(line)
+        if not m:
+            return
+        mm_dd, name, _cusip, side, qty, price, amount = m.groups()
+        self.rows.append({
+            "date": month_day(mm_dd),
+            "name": name.strip(),
+            "side": side,
+            "quantity": to_decimal(qty),
+            "price": to_decimal(price),
+            "amount": to_decimal(amount),
+        })
+
+
+class _Transfers(_Section):
+    """The Deposits and Withdrawals sections.
+
+    Rows are {date, description, amount} where amount is signed: positive
+    for deposits (cash in), negative for withdrawals (cash out).
     """
-    out: list[dict] = []
-    section = None  # "deposit" | "withdrawal" | None
-    for text in pages:
-        for line in text.splitlines():
-            stripped = line.strip()
-            if stripped == "Deposits":
-                section = "deposit"
-                continue
-            if stripped == "Withdrawals":
-                section = "withdrawal"
-                continue
-            if section and (
-                stripped.startswith("Total Deposits")
-                or stripped.startswith("Total Withdrawals")
-                or stripped.startswith("Core Fund Activity")
-                or stripped.startswith("Dividends, Interest")
-                or stripped.startswith("Securities Bought")
+
+    def __init__(self):
+        self.rows: list[dict] = []
+        self.section = None  # "deposit" | "withdrawal" | None
+
+    def heading(self, line):
+        if line == "Deposits":
+            self.section = "deposit"
+        elif line == "Withdrawals":
+            self.section = "withdrawal"
+        else:
+            if self.section and line.startswith(
+                ("Total Deposits", "Total Withdrawals", "Core Fund Activity",
+                 "Dividends, Interest", "Securities Bought")
             ):
-                section = None
-            if not section:
-                continue
-            if stripped.startswith("Date "):  # column header
-                continue
-            m = TRANSFER_RE.match(stripped)
-            if not m:
-                continue
-            mm_dd, description, amount = m.groups()
-            month, day = (int(x) for x in mm_dd.split("/"))
-            amt = to_decimal(amount)
-            if section == "withdrawal" and amt > 0:
-                amt = -amt
-            out.append({
-                "date": date(resolve_year(month, start, end), month, day),
-                "description": description.strip(),
-                "amount": amt,
-            })
-    return out
+                self.section = None
+            self.active = self.section is not None
+            return False
+        self.active = True
+        return True
+
+    def row(self, line, next_line):
+        if line.startswith("Date "):  # column header
+            return
+        m = TRANSFER_RE.match(line)
+        if not m:
+            return
+        mm_dd, description, amount = m.groups()
+        amt = to_decimal(amount)
+        if self.section == "withdrawal" and amt > 0:
+            amt = -amt
+        self.rows.append({
+            "date": month_day(mm_dd),
+            "description": description.strip(),
+            "amount": amt,
+        })
+
+
+def month_day(mm_dd: str) -> tuple[int, int]:
+    month, day = mm_dd.split("/")
+    return int(month), int(day)
+
+
+def parse_statement(pages: list[str]) -> Statement:
+    """Parse the period, holdings, dividends, trades and transfers.
+
+    Each line is stripped once and classified: heading lines update the
+    state of every section, other lines are handed to the open sections
+    only. Row dates are resolved against the period at the end.
+    """
+    holdings, dividends, trades, transfers = sections = (
+        _Holdings(), _Dividends(), _Trades(), _Transfers())
+    active = []
+    period = None
 
+    for text in pages:
+        if period is None:
+            period = PERIOD_RE.search(text)
+        lines = text.splitlines()
+        last = len(lines) - 1
+        for i, raw in enumerate(lines):
+            line = raw.strip()
+            next_line = lines[i + 1] if i < last else None
+            if HEADING_RE.match(line) or DIVIDENDS_HEADING in line:
+                for section in sections:
+                    if not section.heading(line) and section.active:
+                        section.row(line, next_line)
+                active = [section for section in sections if section.active]
+            else:
+                for section in active:
+                    section.row(line, next_line)
+
+    # The period is on the first page; only a header split across pages
+    # needs the joined text.
+    start, end = parse_period(period.group(0) if period else "\n".join(pages))
+    for row in (*dividends.rows, *trades.rows, *transfers.rows):
+        month, day = row["date"]
+        row["date"] = date(resolve_year(month, start, end), month, day)
+    return Statement(start, end, holdings.rows, dividends.rows, trades.rows, transfers.rows)
+
+
+class TickerIndex:
+    """Resolve security names from activity rows to holding tickers.
+
+    A name resolves to the ticker of the holding with that exact name, or
+    else to the first holding (in statement order) whose name is a prefix
+    of it or has it as a prefix, since rows often truncate or extend names.
+    Candidates of the first kind are found by looking up the name cut to
+    each holding name length, those of the second kind as a range of the
+    sorted names, with a sparse table giving the earliest holding in that
+    range. A lookup of a name of length L among n holdings then costs a
+    dict probe per distinct holding name length and a binary search of
+    O(L·log n) character comparisons, rather than a scan of all holdings.
+    """
 
-def resolve_ticker(div_name: str, name_to_ticker: dict[str, str]) -> str | None:
-    if div_name in name_to_ticker:
-        return name_to_ticker[div_name]
-    for n, t in name_to_ticker.items():
-        if div_name.startswith(n) or n.startswith(div_name):
-            return t
-    return None
+    def __init__(self, name_to_ticker: dict[str, str]):
+        self.name_to_ticker = name_to_ticker
+        self.names = list(name_to_ticker)
+        self.order = {n: i for i, n in enumerate(self.names)}
+        self.lengths = sorted({len(n) for n in self.names})
+        self.sorted_names = sorted(self.names)
+        # minima[k][i] is the earliest order among sorted_names[i:i + 2**k].
+        self.minima = [[self.order[n] for n in self.sorted_names]]
+        width = 1
+        while 2 * width <= len(self.sorted_names):
+            prev = self.minima[-1]
+            self.minima.append([min(prev[i], prev[i + width]) for i in range(len(prev) - width)])
+            width *= 2
+
+    def resolve(self, name: str) -> str | None:
+        if name in self.name_to_ticker:
+            return self.name_to_ticker[name]
+        best = len(self.names)
+
+        # Holding names that are a prefix of the name.
+        for length in self.lengths:
+            if length > len(name):
+                break
+            order = self.order.get(name[:length])
+            if order is not None and order < best:
+                best = order
+
+        # Holding names that start with the name.
+        size = len(name)
+        lo = bisect.bisect_left(self.sorted_names, name, key=lambda n: n[:size])
+        hi = bisect.bisect_right(self.sorted_names, name, lo, key=lambda n: n[:size])
+        if lo < hi:
+            k = (hi - lo).bit_length() - 1
+            best = min(best, self.minima[k][lo], self.minima[k][hi - (1 << k)])
+
+        if best < len(self.names):
+            return self.name_to_ticker[self.names[best]]
+        return None
 
 
 class Importer(beangulp.Importer):
-    """An importer for Fidelity brokerage statement PDFs."""
+    """An importer for Fidelity brokerage statement PDFs.
+
+    `workers` sets the number of processes used to extract page text from
+    multi-page statements (default: extract serially). `text_backend`
+    names the pdftext backend to extract text with.
+    """
+
+    text_backend = "pdfplumber"
 
     def __init__(
         self,
@@ -323,6 +431,8 @@ class Importer(beangulp.Importer):
         income_base: str | None = None,
         account_id: str | None = None,
         currency: str = "USD",
+        workers: int | None = None,
+        text_backend: str | None = None,
     ):
         self._account_base = account
         self.income_base = (
@@ -330,6 +440,9 @@ class Importer(beangulp.Importer):
         )
         self.account_id = account_id
         self.currency = currency
+        self.workers = workers
+        if text_backend is not None:
+            self.text_backend = pdftext.backend(text_backend).name
 
     @property
     def cash_account(self) -> str:
@@ -343,9 +456,11 @@ class Importer(beangulp.Importer):
 
     def identify(self, filepath):
         mimetype, _ = mimetypes.guess_type(filepath)
-        if mimetype != "application/pdf":
+        if not pdftext.accepts(filepath, mimetype, self.text_backend):
             return False
-        text = pdf_first_page(filepath)
+        if not pdfsniff.plausible(filepath, "fidelity"):
+            return False
+        text = pdf_first_page(filepath, self.text_backend)
         if "Fidelity" not in text and "FIDELITY" not in text:
             return False
         if self.account_id and self.account_id not in text:
@@ -356,17 +471,15 @@ class Importer(beangulp.Importer):
         return self._account_base
 
     def extract(self, filepath, existing):
-        pages = pdf_to_pages(filepath)
-        full_text = "\n".join(pages)
-        start, end = parse_period(full_text)
-
-        holdings = parse_holdings(pages)
-        name_to_ticker = {h["name"]: t for t, h in holdings.items()}
+        statement = parse_statement(pdf_to_pages(filepath, self.workers, self.text_backend))
+        end = statement.end
+        holdings = statement.holdings
+        tickers = TickerIndex({h["name"]: t for t, h in holdings.items()})
 
         entries = []
 
-        for div in parse_dividends(pages, start, end):
-            ticker = resolve_ticker(div["name"], name_to_ticker)
+        for div in statement.dividends:
+            ticker = tickers.resolve(div["name"])
             if ticker is None:
                 raise KeyError(
                     f"Could not resolve ticker for dividend {div['name']!r} in {filepath}"
@@ -389,8 +502,8 @@ class Importer(beangulp.Importer):
                 ],
             ))
 
-        for trade in parse_trades(pages, start, end):
-            ticker = resolve_ticker(trade["name"], name_to_ticker)
+        for trade in statement.trades:
+            ticker = tickers.resolve(trade["name"])
             if ticker is None:
                 raise KeyError(
                     f"Could not resolve ticker for trade {trade['name']!r} in {filepath}"
@@ -441,7 +554,7 @@ class Importer(beangulp.Importer):
                 postings=postings,
             ))
 
-        for xfer in parse_transfers(pages, start, end):
+        for xfer in statement.transfers:
             narration = (
                 f"Deposit - {xfer['description']}"
                 if xfer["amount"] > 0
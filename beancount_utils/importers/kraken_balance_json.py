@@ -1,14 +1,16 @@
 import datetime
-import json
+import logging
 import os
 import re
 
-from decimal import Decimal
-
 import beangulp
 
+from beancount.core import data
 from beancount.core.data import Amount, Balance, new_metadata
 
+from beancount_utils import jsonload, jsonsniff
+from beancount_utils.jsonload import to_decimal
+
 
 default_assets_map = {
     "XBT": "BTC",
@@ -23,26 +25,29 @@ default_assets_map = {
     "ZUSD": "USD",
 }
 
+logger = logging.getLogger(__name__)
+
 
 class Importer(beangulp.Importer):
     """An importer for Kraken Balance JSON Export."""
 
-    def __init__(self, base_account, assets_map=default_assets_map):
+    def __init__(self, base_account, assets_map=default_assets_map, only_changed=True):
+        """Create an importer.
+
+        With `only_changed`, a balance is only asserted if it differs from
+        the latest Balance of the account and currency in the ledger, so
+        frequent snapshots don't pile up identical assertions.
+        """
         self.base_account = base_account
         self.assets_map = assets_map
+        self.only_changed = only_changed
 
     def identify(self, filepath):
         if not filepath.lower().endswith(".json"):
             return False
 
-        with open(filepath) as f:
-            data = json.load(f)
-
-        if not data or "result" not in data or not isinstance(data['result'], dict):
-            return False
-
         # Check if result looks like currency:balance
-        for asset, balance in data['result'].items():
+        for asset, balance in jsonsniff.sniff(filepath).balances.items():
             if asset in self.assets_map and bool(re.match(r'^-?\d+(\.\d+)?$', balance)):
                 return True
         return False
@@ -56,17 +61,26 @@ class Importer(beangulp.Importer):
         mod_time = os.path.getmtime(filepath)
         date = datetime.datetime.fromtimestamp(mod_time).date()
 
-        with open(filepath) as f:
-            data = json.load(f)
+        document = jsonload.load(filepath)
+        latest = latest_balances(existing, self.base_account) if self.only_changed else {}
 
-        combined = self.combine_stakes(data['result'])
+        combined = self.combine_stakes(document['result'])
+        unchanged = []
         for asset in sorted(combined.keys()):
             balance = combined[asset]
 
             meta = new_metadata(filepath, 0)
             account = f"{self.base_account}:{asset}"
-            amount = Amount(Decimal(balance), asset)
+            amount = Amount(balance, asset)
+            last = latest.get((account, asset))
+            if last and last.amount.number == amount.number:
+                unchanged.append(asset)
+                continue
             entries.append(Balance(meta, date, account, amount, None, None))
+
+        logger.info("%s: %d balances changed%s, %d unchanged%s", filepath,
+                    len(entries), _assets(entry.amount.currency for entry in entries),
+                    len(unchanged), _assets(unchanged))
         return entries
 
     def combine_stakes(self, raw_balances):
@@ -79,7 +93,23 @@ class Importer(beangulp.Importer):
             else:
                 asset = asset
             if asset not in combined_balances:
-                combined_balances[asset] = Decimal(balance)
+                combined_balances[asset] = to_decimal(balance)
             else:
-                combined_balances[asset] += Decimal(balance)
+                combined_balances[asset] += to_decimal(balance)
         return combined_balances
+
+
+def latest_balances(entries, account):
+    """Return the latest Balance of each (account, currency) under account."""
+    latest = {}
+    for entry in entries:
+        if isinstance(entry, data.Balance) and entry.account.startswith(account):
+            key = (entry.account, entry.amount.currency)
+            if key not in latest or entry.date >= latest[key].date:
+                latest[key] = entry
+    return latest
+
+
+def _assets(assets):
+    assets = list(assets)
+    return f" ({' '.join(assets)})" if assets else ''
@@ -1,5 +1,7 @@
 import datetime
-import json
+import functools
+import heapq
+import os
 
 from decimal import Decimal
 
@@ -9,7 +11,10 @@ from beancount.core.data import Amount, Balance, Posting, Transaction, new_metad
 from beancount.core.position import CostSpec
 from beanprice import price as beanprice
 
-from beancount_utils.deduplicate import mark_duplicate_entries, extract_out_of_place
+from beancount_utils import jsonload, jsonsniff
+from beancount_utils.deduplicate import extract_out_of_place, index_import_ids, mark_duplicate_entries, mark_duplicate_ids
+from beancount_utils.jsonload import to_decimal
+from beancount_utils.prices import DEFAULT_WORKERS, PriceMemo, fetch_prices
 
 
 assets_remap = {
@@ -29,69 +34,108 @@ assets_remap = {
 class Importer(beangulp.Importer):
     """An importer for Kraken Ledger JSON Export."""
 
-    def __init__(self, base_account, base_currency='USD', fee_account=None, pnl_account="Income:PnL", stake_account="Income:Staking", price_cache=None):
+    def __init__(self, base_account, base_currency='USD', fee_account=None, pnl_account="Income:PnL", stake_account="Income:Staking", price_cache=None,
+                 price_workers=DEFAULT_WORKERS, price_rate_limits=None, fetch_price=None, price_tolerance=0):
+        """Create an importer.
+
+        Staking rewards are given a cost from the beanprice sources declared
+        on their commodity. A Price directive of the existing entries on
+        the date, or at most `price_tolerance` days away, is used first.
+        The remaining distinct (asset, date) prices are fetched before
+        building entries, by `price_workers` concurrent threads and at most
+        `price_rate_limits[source]` calls per second per source (see
+        beancount_utils.prices.fetch_prices), and extracted as Price
+        directives so the next import finds them in the ledger.
+        `fetch_price` replaces beanprice.fetch_price, e.g. in tests.
+        """
         self.base_account = base_account
         self.base_currency = base_currency
         self.pnl_account = pnl_account
         self.fee_account = fee_account
         self.stake_account = stake_account
         self.price_cache = price_cache
+        self.price_workers = price_workers
+        self.price_rate_limits = price_rate_limits
+        self.fetch_price = fetch_price
+        self.price_tolerance = price_tolerance
 
     def identify(self, filepath):
         if not filepath.lower().endswith(".json"):
             return False
-
-        # Match the account id.
-        with open(filepath) as f:
-            data = json.load(f)
-        return data and "result" in data and "ledger" in data['result']
+        return jsonsniff.sniff(filepath).ledger
 
     def account(self, filepath):
         return self.base_account
 
 
     def extract(self, filepath, existing):
+        data = jsonload.load(filepath)
+        return self._extract_records(parse_ledger(data['result']['ledger'], filepath), filepath, existing)
+
+    def extract_files(self, paths, existing):
+        """Extract several, possibly overlapping, ledger exports at once.
+
+        Rows of all the exports identified among the files and directories
+        given are merged on time, each ledger id once, and extracted as one
+        export: entries come out once, and each staking price is looked up
+        once. Entries refer to the file their rows were first read from.
+        """
+        filepaths = [filepath for filepath in ledger_files(paths) if self.identify(filepath)]
+        if not filepaths:
+            return []
+        ledgers = [parse_ledger(jsonload.load(filepath)['result']['ledger'], filepath) for filepath in filepaths]
+        return self._extract_records(merge_ledgers(ledgers), filepaths[0], existing)
+
+    def _extract_records(self, records, filepath, existing):
         entries = []
 
-        # Initialize beanprice cache and map of commodity:sources
+        # Initialize beanprice cache and map of commodity:(quote, sources)
         currencies = beanprice.find_currencies_declared(existing)
-        commodity_sources = { currency[0]:currency[2] for currency in currencies }
+        commodity_sources = { currency[0]:(currency[1], currency[2]) for currency in currencies }
         if self.price_cache:
             beanprice.setup_cache(self.price_cache, False)
 
-        with open(filepath) as f:
-            data = json.load(f)
-
-        for time, gmap in group_ledgers(data['result']['ledger']).items():
-            for ledger_type, group in gmap.items():
-                meta = new_metadata(filepath, 0)
-                date = datetime.datetime.fromtimestamp(time)
-                if ledger_type == 'staking':
-                    entries.append(self._extract_staking(date.date(), meta, group, commodity_sources))
-                elif ledger_type == 'trade':
-                    narration = extract_narration(group, self.base_currency)
-                    postings = self._extract_postings(group)
-                    entries.append(Transaction(meta, date.date(), '*', None, narration, frozenset(), frozenset(), postings))
-                elif ledger_type == 'withdrawal':
-                    entries.append(self._extract_withdrawal(date.date(), meta, group))
-                else:
-                    print(f"Unknown ledger type: {ledger_type}\n{group}")
-                if False:
-                    entries.extend(extract_balances(group, filepath, date, self.base_account))
+        groups = group_ledgers(records)
+        jobs = staking_price_jobs(groups, commodity_sources, self.base_currency)
+        prices, missing = PriceMemo(existing, self.price_tolerance).split(jobs)
+        fetched = fetch_prices(missing, self.fetch_price, self.price_workers, self.price_rate_limits)
+        for key, price in fetched.items():
+            if price:
+                # Sources may timestamp the price another day; store it on the
+                # day it was asked for, where the next import looks it up.
+                price = price._replace(meta=new_metadata(filepath, 0), date=missing[key].date)
+                prices[key] = price
+                entries.append(price)
+
+        for (time, ledger_type), group in groups.items():
+            meta = new_metadata(group[0].source or filepath, 0)
+            date = datetime.datetime.fromtimestamp(time)
+            if ledger_type == 'staking':
+                entries.append(self._extract_staking(date.date(), meta, group, commodity_sources, prices))
+            elif ledger_type == 'trade':
+                narration = extract_narration(group, self.base_currency)
+                postings = self._extract_postings(group)
+                entries.append(Transaction(meta, date.date(), '*', None, narration, frozenset(), frozenset(), postings))
+            elif ledger_type == 'withdrawal':
+                entries.append(self._extract_withdrawal(date.date(), meta, group))
+            else:
+                print(f"Unknown ledger type: {ledger_type}\n{group}")
+            if False:
+                entries.extend(extract_balances(group, filepath, date, self.base_account))
 
         return entries
 
     def _extract_withdrawal(self, date, meta, group):
         # Assumes group contains only one withdrawal entry
         ledger = group[0]
-        asset = ledger['asset']
+        asset = ledger.asset
         account = self.get_asset_account(asset)
-        amount = Amount(Decimal(ledger['amount']), asset)
-        fee = Amount(Decimal(ledger['fee']), asset)
+        amount = Amount(ledger.amount, asset)
+        fee = Amount(ledger.fee, asset)
         narration = f"Withdrawal {asset}"
 
         postings = [
-            Posting(account, amount, None, None, None, None)
+            Posting(account, amount, None, None, None, record_meta(ledger))
         ]
         if self.fee_account and fee.number != Decimal('0'):
             postings.append(Posting(self.fee_account, fee, None, None, None, None))
@@ -101,28 +145,25 @@ class Importer(beangulp.Importer):
     def get_asset_account(self, asset):
         return self.base_account + ':' + asset
 
-    def _extract_staking(self, date, meta, group, commodity_sources):
+    def _extract_staking(self, date, meta, group, commodity_sources, prices):
         if len(group) != 1:
             raise ValueError("Staking group should contain exactly one entry.")
         ledger = group[0]
-        narration = "Staked " + ledger['asset']
-        account = self.get_asset_account(ledger['asset'])
-        total = Amount(Decimal(ledger['amount']), ledger['asset'])
-        fee = Amount(Decimal(ledger['fee']), ledger['asset'])
-        amount = Amount(total.number - fee.number, ledger['asset'])
+        narration = "Staked " + ledger.asset
+        account = self.get_asset_account(ledger.asset)
+        fee = Amount(ledger.fee, ledger.asset)
+        amount = Amount(ledger.amount - ledger.fee, ledger.asset)
 
         # Get cost, or set posting meta to highlight missing source
         cost = None
         price = None
-        pmeta = None
-        if ledger['asset'] in commodity_sources:
-            srcs = commodity_sources[ledger['asset']]
-            dated_price = beanprice.DatedPrice(self.base_currency, None, date, srcs)
-            price = beanprice.fetch_price(dated_price)
+        pmeta = record_meta(ledger)
+        if ledger.asset in commodity_sources:
+            price = prices.get((ledger.asset, date))
             if price:
                 cost = CostSpec(price.amount.number, None, price.amount.currency, None, None, None)
         else:
-            pmeta = {'notice': f"{ledger['asset']} not found in commodities"}
+            pmeta['notice'] = f"{ledger.asset} not found in commodities"
 
         postings = [
             Posting(self.stake_account, None, None, None, None, None),
@@ -137,47 +178,143 @@ class Importer(beangulp.Importer):
         if is_sale(group, self.base_currency):
             postings.append(Posting(self.pnl_account, None, None, None, None, None))
         for ledger in group:
-            asset_account = self.base_account + ':' + ledger['asset']
-            amount = Decimal(ledger['amount'])
+            asset_account = self.base_account + ':' + ledger.asset
             # Ignore 0-amount KFEE entries
-            if ledger['asset'] == 'KFEE' and amount < 0.01:
+            if ledger.asset == 'KFEE' and ledger.amount < 0.01:
                 continue
             cost = extract_cost(ledger, group, self.base_currency)
-            amount = Amount(amount, ledger['asset'])
-            postings.append(Posting(asset_account, amount, cost, None, None, None))
+            amount = Amount(ledger.amount, ledger.asset)
+            postings.append(Posting(asset_account, amount, cost, None, None, record_meta(ledger)))
         return postings
 
     def deduplicate(self, entries, existing):
-        mark_duplicate_entries(entries, existing, self.base_account)
+        # Entries imported with ledger ids are matched by id. Others (prices,
+        # or entries imported before ids were recorded) the windowed way.
+        index, legacy = index_import_ids(existing, self.base_account)
+        remaining = mark_duplicate_ids(entries, index, self.base_account)
+        mark_duplicate_entries(remaining, legacy, self.base_account)
         entries.extend(extract_out_of_place(existing, entries, self.base_account))
 
-def sanitize_assets(ledger):
-    for tid, entry in ledger.items():
-        # Trim .F, .S, etc.
-        entry['asset'] = entry['asset'].split('.')[0]
-        if entry['asset'] in assets_remap:
-            entry['asset'] = assets_remap[entry['asset']]
-        yield tid, entry
-
-def group_ledgers(ledger):
+class LedgerRecord:
+    """A row of the ledger export, with typed values."""
+
+    __slots__ = ('id', 'refid', 'time', 'type', 'subtype', 'asset', 'amount', 'fee', 'balance', 'source')
+
+    def __init__(self, id, refid, time, type, subtype, asset, amount, fee, balance, source=None):
+        self.id = id
+        self.refid = refid
+        self.time = time
+        self.type = type
+        self.subtype = subtype
+        self.asset = asset
+        self.amount = amount
+        self.fee = fee
+        self.balance = balance
+        self.source = source
+
+    def __repr__(self):
+        return (f"LedgerRecord({self.id!r}, {self.refid!r}, {self.time!r}, {self.type!r}, {self.subtype!r}, "
+                f"{self.asset!r}, {self.amount!r}, {self.fee!r}, {self.balance!r})")
+
+def record_meta(record):
+    """Posting metadata identifying the ledger row, used to deduplicate."""
+    return {'import_id': record.id, 'refid': record.refid}
+
+@functools.lru_cache(maxsize=None)
+def normalize_asset(asset):
+    # Trim .F, .S, etc.
+    asset = asset.split('.')[0]
+    return assets_remap.get(asset, asset)
+
+def parse_ledger(ledger, source=None):
+    """Parse the rows of a ledger export, a dict of ledger id -> row.
+
+    `source` is the path of the export, kept on each record.
+    """
+    # Few distinct values repeat over a long history (fees are mostly zero),
+    # so each is only converted once.
+    decimals = {}
+
+    def decimal(value):
+        try:
+            return decimals[value]
+        except KeyError:
+            number = decimals[value] = to_decimal(value)
+            return number
+
+    return [
+        LedgerRecord(tid, entry['refid'], entry['time'], entry['type'], entry.get('subtype', ''),
+                     normalize_asset(entry['asset']), decimal(entry['amount']),
+                     decimal(entry['fee']), decimal(entry['balance']), source)
+        for tid, entry in ledger.items()
+    ]
+
+def ledger_files(paths):
+    """Expand directories among paths to the JSON files they contain."""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                filepath = os.path.join(path, name)
+                if name.lower().endswith('.json') and os.path.isfile(filepath):
+                    yield filepath
+        else:
+            yield path
+
+def merge_ledgers(ledgers):
+    """Merge lists of LedgerRecords on time, yielding each ledger id once.
+
+    The first list holding an id wins. Exports list rows newest first, so
+    each list is sorted on its own (nearly free on sorted input) before the
+    streams are merged.
+    """
+    streams = [sorted(records, key=lambda record: record.time) for records in ledgers]
+    seen = set()
+    for record in heapq.merge(*streams, key=lambda record: record.time):
+        if record.id not in seen:
+            seen.add(record.id)
+            yield record
+
+def group_ledgers(records):
+    """Group LedgerRecords into a dict of (time, type) -> list of records."""
     groups = {}
-    for tid, entry in sanitize_assets(ledger):
-        time = entry['time']
-        if time not in groups:
-            groups[time] = {}
-        if entry['type'] not in groups[time]:
-            groups[time][entry['type']] = []
-        groups[time][entry['type']].append(entry)
+    for record in records:
+        key = (record.time, record.type)
+        if key in groups:
+            groups[key].append(record)
+        else:
+            groups[key] = [record]
     return groups
 
+def staking_price_jobs(groups, commodity_sources, base_currency):
+    """Return a beanprice job per distinct (asset, date) of staking rewards.
+
+    Args:
+      groups: The grouped ledger, see group_ledgers().
+      commodity_sources: A dict of asset -> (quote currency, list of
+        beanprice PriceSource), as declared on its commodity.
+      base_currency: The currency to price in if none is declared.
+    Returns:
+      A dict of (asset, date) -> beanprice.DatedPrice.
+    """
+    jobs = {}
+    for (time, ledger_type), group in groups.items():
+        if ledger_type != 'staking' or len(group) != 1 or group[0].asset not in commodity_sources:
+            continue
+        asset = group[0].asset
+        date = datetime.datetime.fromtimestamp(time).date()
+        if (asset, date) not in jobs:
+            quote, sources = commodity_sources[asset]
+            jobs[(asset, date)] = beanprice.DatedPrice(asset, quote or base_currency, date, sources)
+    return jobs
+
 def extract_narration(group, base_currency):
     narration = None
     for entry in group:
-        if entry['asset'] != base_currency:
-            if Decimal(entry['amount']) > 0:
-                narration = "Buy " + entry['asset']
+        if entry.asset != base_currency:
+            if entry.amount > 0:
+                narration = "Buy " + entry.asset
             else:
-                narration = "Sell " + entry['asset']
+                narration = "Sell " + entry.asset
     return narration
 
 def extract_balances(group, filepath, date, base_account):
@@ -186,28 +323,27 @@ def extract_balances(group, filepath, date, base_account):
 
     for ledger in group:
         meta = new_metadata(filepath, 0)
-        account = base_account + ':' + ledger['asset']
-        amount = Amount(Decimal(ledger['balance']), ledger['asset'])
+        account = base_account + ':' + ledger.asset
+        amount = Amount(ledger.balance, ledger.asset)
         yield Balance(meta, date.date(), account, amount, None, None)
 
 def extract_cost(ledger, group, base_currency):
-    if ledger['asset'] == base_currency:
+    if ledger.asset == base_currency:
         return None
     cost = None
     for entry in group:
-        if entry['asset'] == base_currency:
-            amount = Decimal(entry['amount'])
-            if amount < 0:
+        if entry.asset == base_currency:
+            if entry.amount < 0:
                 # Reduction in currenct = buy
-                #cost = CostSpec(Decimal(0), -Decimal(entry['amount']), base_currency, None, None, None)
-                cost = CostSpec(None, -Decimal(entry['amount']), base_currency, None, None, None)
+                #cost = CostSpec(Decimal(0), -entry.amount, base_currency, None, None, None)
+                cost = CostSpec(None, -entry.amount, base_currency, None, None, None)
             else:
                 cost = CostSpec(None, None, None, None, None, None)
     return cost
 
 def is_sale(group, base_currency):
     for ledger in group:
-        if ledger['asset'] != base_currency:
-            if Decimal(ledger['amount']) < 0:
+        if ledger.asset != base_currency:
+            if ledger.amount < 0:
                 return True
     return False
@@ -13,11 +13,48 @@ from beangulp import mimetypes
 from beangulp.testing import main
 
 from beancount_utils.deduplicate import mark_duplicate_entries, extract_out_of_place
+from beancount_utils.filecache import per_file
 
 
 # Prefix used to denote raw CUSIP commodities (bonds, no ticker)
 bond_prefix = 'C.'
 
+# The SIGNON block sits at the top of the file; don't read past this to find it
+SIGNON_LIMIT = 64 * 1024
+SIGNON_END_RE = re.compile(rb'</SIGNONMSGSRSV1>', re.IGNORECASE)
+FID_RE = re.compile(rb'<FID>\s*([^<\r\n]+)', re.IGNORECASE)
+
+
+def sniff_fid(filepath):
+    """Return the <FID> of the SIGNON block without parsing the whole file.
+
+    Reads only as far as the end of the SIGNON block. Returns None if no FID
+    was found there, or the end of the block wasn't within SIGNON_LIMIT, in
+    which case callers should fall back to parse_ofx().
+    """
+    head = b''
+    with open(filepath, 'rb') as f:
+        while len(head) < SIGNON_LIMIT:
+            chunk = f.read(4096)
+            if not chunk:
+                break
+            head += chunk
+            end = SIGNON_END_RE.search(head)
+            if end:
+                match = FID_RE.search(head, 0, end.start())
+                if match:
+                    return match.group(1).strip().decode('ascii', errors='replace')
+                return None
+    return None
+
+
+@per_file(maxsize=4)
+def parse_ofx(filepath):
+    """Parse and convert an OFX file with ofxtools, once per file version."""
+    parser = OFXTree()
+    parser.parse(filepath)
+    return parser.convert()
+
 
 class Importer(beangulp.Importer):
     """A beangulp-based beancount importer for Merrill ofx exports"""
@@ -41,10 +78,10 @@ class Importer(beangulp.Importer):
         mimetype, encoding = mimetypes.guess_type(filepath)
         if mimetype != 'application/vnd.intu.qfx' and not filepath.lower().endswith('.ofx'):
             return False
-        parser = OFXTree()
-        parser.parse(filepath)
-        ofx = parser.convert()
-        return ofx.signon.fi.fid == self.match_fid
+        fid = sniff_fid(filepath)
+        if fid is None:
+            fid = parse_ofx(filepath).signon.fi.fid
+        return fid == self.match_fid
 
     def account(self, filepath):
         return self.file_account
@@ -54,9 +91,7 @@ class Importer(beangulp.Importer):
 
     def extract(self, filepath, existing):
         entries = []
-        parser = OFXTree()
-        parser.parse(filepath)
-        ofx = parser.convert()
+        ofx = parse_ofx(filepath)
 
         self.extract_tickers(ofx.securities)
 
@@ -64,7 +99,6 @@ class Importer(beangulp.Importer):
             entries.append(self.extract_security_price(security))
 
         for stmt in ofx.statements:
-            print("\n\n{}\n\n".format(stmt.__repr__()))
             asofdate = stmt.dtasof.date()
             if 'invposlist' in stmt:
                 for invpos in stmt.invposlist:
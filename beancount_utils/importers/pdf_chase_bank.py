@@ -2,41 +2,57 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import re
 
-from pypdf import PdfReader
-
 from beancount.core.data import Amount, Balance, new_metadata
 import beangulp
 from beangulp import mimetypes
 
+from beancount_utils import pdfsniff, pdftext
+
 
-def pdf_to_text(filename):
-    pages = [ page.extract_text() for page in PdfReader(filename).pages ]
+def pdf_to_text(filename, backend='pypdf'):
+    pages = pdftext.get_pages(filename, pdftext.backend(backend))
     return ''.join(pages)
 
 
+def pdf_first_page(filename, backend='pypdf'):
+    """Text of the first page, which holds the account number.
+
+    Goes through the page cache, so extract() only extracts the rest.
+    """
+    pages = pdftext.get_pages(filename, pdftext.backend(backend), [0])
+    return pages[0] if pages else ''
+
+
 class Importer(beangulp.Importer):
     """An importer for Chase Bank PDF statements."""
 
-    def __init__(self, account, last4acct, currency="USD"):
+    text_backend = 'pypdf'
+
+    def __init__(self, account, last4acct, currency="USD", text_backend=None):
         self._account = account
         self.currency = currency
         self.last4acct = last4acct
+        self._account_number_re = re.compile(r'Account Number: ( \d{4}){3} ' + last4acct)
+        if text_backend is not None:
+            self.text_backend = pdftext.backend(text_backend).name
 
     def identify(self, filepath):
         mimetype, encoding = mimetypes.guess_type(filepath)
-        if mimetype != 'application/pdf':
+        if not pdftext.accepts(filepath, mimetype, self.text_backend):
+            return False
+        if not pdfsniff.plausible(filepath, 'chase'):
             return False
 
-        text = pdf_to_text(filepath)
+        text = pdf_first_page(filepath, self.text_backend)
         if text:
-            return re.search(r'Account Number: ( \d{4}){3} ' + self.last4acct, text) is not None
+            return self._account_number_re.search(text) is not None
 
     def account(self, filepath):
         return self._account
 
     def extract(self, filepath, existing):
         entries = []
-        text = pdf_to_text(filepath)
+        text = pdf_to_text(filepath, self.text_backend)
         entries.append(self._extract_balance(filepath, text))
         return entries
 
@@ -1,13 +1,32 @@
 from datetime import datetime
-from decimal import Decimal
 from os import path
 from beancount.core.data import Amount, Posting, Transaction, new_metadata
 from beangulp import importer, mimetypes
 from beangulp.importers import csvbase
-import json
+import collections
 import re
 import sys
 
+from beancount_utils import jsonload, jsonsniff
+from beancount_utils.filecache import per_file
+from beancount_utils.jsonload import to_decimal
+
+
+# A parsed bridge dump, and its accounts by id.
+Document = collections.namedtuple('Document', 'data accounts')
+
+
+@per_file(maxsize=4)
+def load_document(filepath):
+    """Parse a SimpleFIN bridge dump once per file version.
+
+    The document is shared by every importer instance configured on the
+    dump, it must not be modified.
+    """
+    data = jsonload.load(filepath)
+    accounts = {account['id']: account for account in data.get('accounts', []) if 'id' in account}
+    return Document(data, accounts)
+
 
 class Importer(importer.Importer):
     def __init__(self, accounts, currency='USD', decorate=None):
@@ -19,11 +38,8 @@ class Importer(importer.Importer):
         mimetype, encoding = mimetypes.guess_type(filepath)
         if mimetype != 'application/json':
             return False
-        with open(filepath) as f:
-            data = json.load(f)
-            if 'accounts' not in data or not isinstance(data['accounts'], list) or 'id' not in data['accounts'][0]:
-                return False
-        return True
+        account_ids = jsonsniff.sniff(filepath).account_ids
+        return bool(account_ids) and account_ids[0] is not None
 
     def account(self, filepath):
         return 'SimpleFIN'
@@ -42,8 +58,7 @@ class Importer(importer.Importer):
         return entries
 
     def load_json(self, filepath):
-        with open(filepath) as f:
-            return json.load(f)
+        return load_document(filepath).data
 
     def extract_account(self, filepath, account, data, entries):
         for transaction in data['transactions']:
@@ -53,7 +68,7 @@ class Importer(importer.Importer):
             flag = '!' if 'pending' in transaction and transaction['pending'] else '*'
             payee = transaction['payee'] if 'payee' in transaction else transaction['description']
             narration = transaction['description']
-            amount = Amount(Decimal(transaction['amount']), self.currency)
+            amount = Amount(to_decimal(transaction['amount']), self.currency)
             postings = [Posting(account, amount, None, None, None, {'description':transaction['description']})]
             entries.append(Transaction(meta, date, flag, payee, narration, frozenset(), frozenset(), postings))
 
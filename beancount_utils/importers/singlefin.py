@@ -1,13 +1,14 @@
 from datetime import datetime
-from decimal import Decimal
 from os import path
 from beancount.core.data import Amount, Posting, Transaction, new_metadata
 from beangulp import importer, mimetypes
-import json
 import re
 
+from beancount_utils import jsonsniff
 from beancount_utils.deduplicate import mark_duplicate_entries
 from beancount_utils.decorator import Decorator
+from beancount_utils.importers.simplefin import load_document
+from beancount_utils.jsonload import to_decimal
 
 
 class Importer(importer.Importer):
@@ -22,26 +23,19 @@ class Importer(importer.Importer):
         mimetype, encoding = mimetypes.guess_type(filepath)
         if mimetype != 'application/json':
             return False
-        with open(filepath) as f:
-            data = json.load(f)
-            if 'accounts' in data and isinstance(data['accounts'], list):
-                for account in data['accounts']:
-                    if 'id' in account and account['id'] == self.acctid:
-                        return True
-        return False
+        return self.acctid in jsonsniff.sniff(filepath).account_ids
 
     def account(self, filepath):
         return 'SimpleFIN'
 
     def extract(self, filepath, existing):
-        data = self.load_json(filepath)
-        for account in data['accounts']:
-            if account['id'] == self.acctid:
-                return self.extract_account(filepath, self._account, account)
+        account = load_document(filepath).accounts.get(self.acctid)
+        if account is None:
+            return []
+        return self.extract_account(filepath, self._account, account)
 
     def load_json(self, filepath):
-        with open(filepath) as f:
-            return json.load(f)
+        return load_document(filepath).data
 
     def extract_account(self, filepath, account, data):
         entries = []
@@ -53,7 +47,7 @@ class Importer(importer.Importer):
             payee = transaction['payee'] if 'payee' in transaction else transaction['description']
             # Many of these have absurdly     long                 spaces
             narration = re.sub(' +', ' ', transaction['description'])
-            amount = Amount(Decimal(transaction['amount']), self.currency)
+            amount = Amount(to_decimal(transaction['amount']), self.currency)
             postings = [Posting(account, amount, None, None, None, {'description':narration})]
             entries.append(Transaction(meta, date, flag, payee, narration, frozenset(), frozenset(), postings))
         return entries
@@ -13,12 +13,12 @@ import re
 from datetime import date, timedelta
 from decimal import Decimal
 
-import pdfplumber
-
 from beancount.core.data import Amount, Balance, Posting, Transaction, new_metadata
 import beangulp
 from beangulp import mimetypes
 
+from beancount_utils import pdfsniff, pdftext
+
 
 PERIOD_RE = re.compile(
     r"(January|February|March|April|May|June|July|August|September|October|"
@@ -44,6 +44,9 @@ SOURCE_ROW_RE = re.compile(
     rf"(?P<vested>[\d.]+%)\s*$"
 )
 
+# A page holding a Source table mentions both, whatever the text layout.
+TABLE_MARKERS = ("Source", "Money In")
+
 DEFAULT_FEES_ACCOUNT = "Expenses:Financial:Fees"
 DEFAULT_PNL_ACCOUNT = "Income:Investments:Transamerica:PnL:Pretax"
 
@@ -61,17 +64,32 @@ def parse_period(text: str) -> tuple[date, date]:
     return start, end
 
 
-def pdf_to_pages(filepath: str) -> list[str]:
-    with pdfplumber.open(filepath) as pdf:
-        return [p.extract_text() or "" for p in pdf.pages]
+def pdf_to_pages(filepath: str, workers: int | None = None, backend: str = "pdfplumber") -> list[str]:
+    """Extract all pages, with `workers` processes for multi-page statements."""
+    return pdftext.get_pages(filepath, pdftext.backend(backend), workers=workers)
 
 
-def pdf_first_page(filepath: str) -> str:
+def pdf_first_page(filepath: str, backend: str = "pdfplumber") -> str:
     """Cheap text extraction for identify(); avoids reading the whole PDF."""
-    with pdfplumber.open(filepath) as pdf:
-        if not pdf.pages:
-            return ""
-        return pdf.pages[0].extract_text() or ""
+    pages = pdftext.get_pages(filepath, pdftext.backend(backend), [0])
+    return pages[0] if pages else ""
+
+
+def find_table_pages(filepath: str, backend: str = "pypdf") -> list[int]:
+    """Locate the pages with a Source table from a quick pypdf text pass."""
+    pages = pdftext.get_pages(filepath, pdftext.backend(backend))
+    return [i for i, text in enumerate(pages) if all(m in text for m in TABLE_MARKERS)]
+
+
+def find_source_pages(filepath: str, names: list[str], backend: str = "pypdf") -> list[int]:
+    """Locate the pages naming any of the sources in the quick text pass."""
+    pages = pdftext.get_pages(filepath, pdftext.backend(backend))
+    return [i for i, text in enumerate(pages) if any(name in text for name in names)]
+
+
+def is_table_heading(line: str) -> bool:
+    """Whether a stripped line of layout text opens a Source table."""
+    return line.startswith("Source ") and "Money In" in line
 
 
 class Importer(beangulp.Importer):
@@ -82,8 +100,14 @@ class Importer(beangulp.Importer):
         Importer's fees_account / pnl_account), or
       - a list of dicts, each with keys 'source' and 'account', and optional
         per-row overrides 'fees_account' and 'pnl_account'.
+
+    `workers` sets the number of processes used to extract page text from
+    multi-page statements (default: extract serially). `text_backend`
+    names the pdftext backend to extract text with.
     """
 
+    text_backend = "pdfplumber"
+
     def __init__(
         self,
         sources: dict[str, str] | list[dict],
@@ -91,11 +115,16 @@ class Importer(beangulp.Importer):
         pnl_account: str = DEFAULT_PNL_ACCOUNT,
         currency: str = "USD",
         account_name: str = "Assets:Investments:Transamerica",
+        workers: int | None = None,
+        text_backend: str | None = None,
     ):
         self.fees_account = fees_account
         self.pnl_account = pnl_account
         self.currency = currency
         self._account = account_name
+        self.workers = workers
+        if text_backend is not None:
+            self.text_backend = pdftext.backend(text_backend).name
         self.sources = self._normalize_sources(sources)
 
     def _normalize_sources(self, sources) -> list[dict]:
@@ -118,9 +147,11 @@ class Importer(beangulp.Importer):
 
     def identify(self, filepath):
         mimetype, _ = mimetypes.guess_type(filepath)
-        if mimetype != "application/pdf":
+        if not pdftext.accepts(filepath, mimetype, self.text_backend):
+            return False
+        if not pdfsniff.plausible(filepath, "transamerica"):
             return False
-        text = pdf_first_page(filepath)
+        text = pdf_first_page(filepath, self.text_backend)
         if "Transamerica" not in text:
             return False
         return PERIOD_RE.search(text) is not None
@@ -129,12 +160,29 @@ class Importer(beangulp.Importer):
         return self._account
 
     def extract(self, filepath, existing):
-        pages = pdf_to_pages(filepath)
+        # Layout extraction is slow, so run it only on the first page, which
+        # has the period (see identify()), and the pages with Source tables.
+        # A fixture has no layout to skip; replay it for both passes.
+        quick = "replay" if self.text_backend == "replay" else "pypdf"
+        table_pages = find_table_pages(filepath, quick)
+        indices = sorted({0, *table_pages})
+        pages = pdftext.get_pages(filepath, pdftext.backend(self.text_backend), indices, self.workers)
+        parsed = self._parse_rows(pages)
+        found = [i for i, text in zip(indices, pages)
+                 if any(is_table_heading(line.strip()) for line in text.splitlines())]
+        # A page left out that names a configured source may hold a table the
+        # quick pass missed, and repeated sources take the last table's row.
+        names = [cfg["source"] for cfg in self.sources]
+        stray = set(find_source_pages(filepath, names, quick)) - set(indices)
+        if found != table_pages or stray or any(name not in parsed for name in names):
+            # The two passes disagree on where the tables are, so the quick
+            # one may have missed some; fall back to every page.
+            pages = pdf_to_pages(filepath, self.workers, self.text_backend)
+            parsed = self._parse_rows(pages)
+
         full_text = "\n".join(pages)
         _, period_end = parse_period(full_text)
 
-        parsed = self._parse_rows(pages)
-
         rows: list[dict] = []
         for cfg in self.sources:
             row = parsed.get(cfg["source"])
@@ -211,7 +259,7 @@ class Importer(beangulp.Importer):
             in_source_table = False
             for line in text.splitlines():
                 stripped = line.strip()
-                if stripped.startswith("Source ") and "Money In" in stripped:
+                if is_table_heading(stripped):
                     in_source_table = True
                     continue
                 if not in_source_table:
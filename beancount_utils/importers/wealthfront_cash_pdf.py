@@ -0,0 +1,156 @@
+"""
+Extract transactions from a Wealthfront Cash (Green Dot) monthly statement PDF.
+
+Transaction rows are set in a font size of their own, which tells them apart
+from headers, footers and summaries (see
+https://pypdf.readthedocs.io/en/stable/user/extract-text.html#example-1-ignore-header-and-footer).
+Each row is a date line followed by an amount line:
+
+  MM/DD/YYYY <description>
+  Debit- $<amount>   or   Deposit+ $<amount>
+
+Pages are read one at a time through pypdf's visitor_text callback and
+transactions are yielded as soon as their rows are complete, so only the
+current page is held in memory. Payees are left as printed; use a Decorator
+to categorize them.
+"""
+from datetime import date
+from decimal import Decimal
+import logging
+import re
+
+from beancount.core.data import Amount, Posting, Transaction, new_metadata
+import beangulp
+from beangulp import mimetypes
+from pypdf import PdfReader
+
+from beancount_utils import pdfsniff, pdftext
+from beancount_utils.decorator import Decorator
+from beancount_utils.posting_deduplicator import PostingDeduplicator
+
+
+logger = logging.getLogger(__name__)
+
+BODY_FONT_SIZE = 9.38
+
+DATE_RE = re.compile(r'^(\d\d)/(\d\d)/(\d\d\d\d) (.*)$')
+AMOUNT_SPLIT_RE = re.compile(r'\s\$')
+SIGNS = {'Debit-': -1, 'Deposit+': 1}
+
+
+def iter_lines(filepath, font_size=BODY_FONT_SIZE):
+    """Yield the lines of body text of a statement, a page at a time.
+
+    A line left open at the bottom of a page is completed by the next page,
+    as if the text of all pages had been joined.
+    """
+    parts = []
+
+    def visitor(text, cm, tm, font_dict, size):
+        if size == font_size:
+            parts.append(text)
+
+    partial = ''
+    for page in PdfReader(filepath).pages:
+        page.extract_text(visitor_text=visitor)
+        lines = (partial + ''.join(parts)).splitlines(keepends=True)
+        parts.clear()
+        partial = lines.pop() if lines else ''
+        yield from ''.join(lines).splitlines()
+    yield from partial.splitlines()
+
+
+def iter_transactions(lines, filepath, account, currency='USD', flag='*'):
+    """Yield a Transaction per (date line, amount line) pair.
+
+    Args:
+      lines: An iterable of body text lines, see iter_lines().
+      filepath: The statement path, for metadata.
+      account: The account to post to.
+      currency: The currency of the amounts.
+      flag: The transaction flag.
+    Yields:
+      Transactions with a single posting, carrying the description in
+      the posting's `memo` metadata.
+    """
+    txn_date = None
+    txn_payee = None
+    for lineno, line in enumerate(lines, 1):
+        if txn_date and txn_payee:
+            parts = AMOUNT_SPLIT_RE.split(line)
+            if len(parts) == 2:
+                category, number = parts
+                if category not in SIGNS:
+                    raise ValueError(f"Unexpected amount category {category!r} in {filepath}")
+                units = Amount(SIGNS[category] * Decimal(number.replace(',', '')), currency)
+                posting = Posting(account, units, None, None, None, {'memo': txn_payee})
+                yield Transaction(new_metadata(filepath, lineno), txn_date, flag, txn_payee, '',
+                                  frozenset(), frozenset(), [posting])
+            txn_date = None
+            txn_payee = None
+        else:
+            m = DATE_RE.search(line)
+            if m and not m.group(4).startswith("End of Day Settlement"):
+                month, day, year, txn_payee = m.groups()
+                txn_date = date(int(year), int(month), int(day))
+            else:
+                txn_date = None
+                txn_payee = None
+
+
+def payables_decorator(payables):
+    """Return a Decorator for the payables of a converter configuration.
+
+    Payables match the payee with 're' and may set flag, payee, narration,
+    tags and an expense_account to balance against. When several match, the
+    last one listed wins, where a Decorator applies the first.
+    """
+    return Decorator.from_list([
+        {('target_account' if key == 'expense_account' else key): value for key, value in payable.items()}
+        for payable in reversed(payables)
+    ])
+
+
+class Importer(beangulp.Importer):
+    """An importer for Wealthfront Cash statement PDFs.
+
+    Transactions are always read with pypdf, whose text callback reports
+    font sizes; `text_backend` only applies to identify().
+    """
+
+    text_backend = 'pypdf'
+
+    def __init__(self, account='Assets:Liquid:Wealthfront', currency='USD', decorator=None,
+                 text_backend=None):
+        self._account = account
+        if text_backend is not None:
+            self.text_backend = pdftext.backend(text_backend).name
+        self.currency = currency
+        self.decorator = decorator
+
+    def identify(self, filepath):
+        mimetype, _ = mimetypes.guess_type(filepath)
+        if not pdftext.accepts(filepath, mimetype, self.text_backend):
+            return False
+        if not pdfsniff.plausible(filepath, 'wealthfront'):
+            return False
+        pages = pdftext.get_pages(filepath, pdftext.backend(self.text_backend), [0])
+        return bool(pages) and 'Wealthfront' in pages[0]
+
+    def account(self, filepath):
+        return self._account
+
+    def extract(self, filepath, existing):
+        self.pdup = PostingDeduplicator(self._account, 'wealthfront', logger)
+        entries = []
+        for txn in iter_transactions(iter_lines(filepath), filepath, self._account, self.currency):
+            self.pdup.mark_posting(txn.date, txn.payee, txn.postings[0])
+            entries.append(txn)
+        return entries
+
+    def deduplicate(self, entries, existing):
+        self.pdup.deduplicate(entries, existing)
+
+        # Decorate after marking dupes to avoid interfering with the duplicate detection.
+        if self.decorator:
+            self.decorator.decorate(entries)
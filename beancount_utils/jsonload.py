@@ -0,0 +1,78 @@
+"""Loading of JSON exports through the fastest available parser.
+
+orjson or msgspec parse large exports several times faster than the json
+module; they are used when installed, the json module otherwise. All of them
+return plain dicts, lists, strs, ints and floats, the same ones for the
+exports we import. Amounts should go through to_decimal(): exports give
+them as strings, which are converted exactly, and JSON numbers are converted
+from their shortest representation rather than their binary float value.
+
+bench/bench_json.py compares the backends on large synthetic exports.
+"""
+import importlib.util
+import json
+
+from decimal import Decimal
+
+
+def _orjson(contents):
+    import orjson
+    return orjson.loads(contents)
+
+
+def _msgspec(contents):
+    import msgspec
+    return msgspec.json.decode(contents)
+
+
+def _json(contents):
+    return json.loads(contents)
+
+
+# Parsers by name, from the fastest. Each takes the file contents as bytes.
+BACKENDS = {
+    'orjson': _orjson,
+    'msgspec': _msgspec,
+    'json': _json,
+}
+
+
+def available():
+    """Return the names of the installed backends, from the fastest."""
+    return [name for name in BACKENDS if name == 'json' or importlib.util.find_spec(name)]
+
+
+DEFAULT_BACKEND = available()[0]
+
+
+def load(filepath, backend=None):
+    """Parse a JSON file.
+
+    Args:
+      filepath: Path of the file.
+      backend: A key of BACKENDS, DEFAULT_BACKEND if None.
+    Returns:
+      The parsed document.
+    Raises:
+      ValueError: If the file isn't valid JSON.
+    """
+    with open(filepath, 'rb') as f:
+        contents = f.read()
+    backend = backend or DEFAULT_BACKEND
+    try:
+        return BACKENDS[backend](contents)
+    except ValueError:
+        if backend == 'json':
+            raise
+        # orjson and msgspec reject some documents the json module accepts
+        # (lone surrogates in strings, NaN); let it decide.
+        return _json(contents)
+
+
+def to_decimal(value):
+    """Return a JSON amount, a string or a number, as a Decimal."""
+    if isinstance(value, (str, int, Decimal)) and not isinstance(value, bool):
+        return Decimal(value)
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    raise TypeError(f"Not an amount: {value!r}")
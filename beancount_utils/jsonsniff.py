@@ -0,0 +1,186 @@
+"""Cheap pre-identification of JSON exports.
+
+The JSON importers only need a couple of top-level facts to identify a
+document: whether it is a Kraken ledger (`result.ledger`), the balances of a
+Kraken balance export (`result` as asset: amount strings), or the ids of a
+SimpleFIN document (`accounts[*].id`). Loading a multi-MB export to look at
+them, once per importer instance, dominates identify(). Instead the document
+is read a chunk at a time, the values nobody looks at are dropped as soon as
+they are complete, and reading stops as soon as the answer is known (right
+at `result.ledger` for a Kraken ledger). The result is shared by all
+importers through a per-file cache.
+"""
+import collections
+import json
+import re
+
+from beancount_utils.filecache import per_file
+
+
+CHUNK_SIZE = 64 * 1024
+
+# What the JSON importers look at in a document: whether `result` is an
+# object with a `ledger` member, the string members of a `result` object, and
+# the `id` of each object of the `accounts` array (None if it has none).
+Shape = collections.namedtuple('Shape', 'ledger balances account_ids')
+
+EMPTY = Shape(False, {}, ())
+
+_STRING = r'"(?:[^"\\]|\\.)*"'
+
+WS_RE = re.compile(r'\s*')
+STRING_RE = re.compile(_STRING, re.DOTALL)
+# Any run of number and literal characters, json.loads() validates it.
+SCALAR_RE = re.compile(r'[-+.\w]+')
+DECODER = json.JSONDecoder()
+
+
+@per_file(maxsize=64)
+def sniff(filepath):
+    """Return the Shape of a JSON document, or EMPTY if it isn't readable."""
+    try:
+        with open(filepath, encoding='utf-8') as f:
+            return _shape(_Reader(f))
+    except (OSError, ValueError):
+        return EMPTY
+
+
+def _shape(reader):
+    balances, account_ids = {}, []
+    if reader.peek() != '{':
+        return EMPTY
+    for key in reader.members():
+        if key == 'result' and reader.peek() == '{':
+            for name in reader.members():
+                if name == 'ledger':
+                    # Nothing else is needed from a ledger.
+                    return Shape(True, balances, tuple(account_ids))
+                if reader.peek() == '"':
+                    balances[name] = reader.string()
+                else:
+                    reader.skip()
+        elif key == 'accounts' and reader.peek() == '[':
+            for _ in reader.elements():
+                if reader.peek() != '{':
+                    reader.skip()
+                    continue
+                account_id = None
+                for name in reader.members():
+                    if name == 'id' and reader.peek() != '{' and reader.peek() != '[':
+                        account_id = reader.value()
+                    else:
+                        reader.skip()
+                account_ids.append(account_id)
+        else:
+            reader.skip()
+    return Shape(False, balances, tuple(account_ids))
+
+
+class _Reader:
+    """A JSON tokenizer over a text file, reading it a chunk at a time.
+
+    members() and elements() yield before each value, which the caller must
+    consume with string(), value() or skip() before resuming them.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+
+    def _fill(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _match(self, regex):
+        # Retry a match reaching the end of the buffer, it may go on.
+        while True:
+            m = regex.match(self.buf, self.pos)
+            if m and m.end() < len(self.buf):
+                break
+            if not self._fill():
+                break
+        if not m:
+            raise ValueError(f"Invalid JSON at {self.buf[self.pos:self.pos + 20]!r}")
+        self.pos = m.end()
+        return m.group()
+
+    def peek(self):
+        """Return the next significant character, without consuming it."""
+        while True:
+            self.pos = WS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON")
+
+    def _expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at {self.buf[self.pos:self.pos + 20]!r}")
+        self.pos += 1
+
+    def string(self):
+        if self.peek() != '"':
+            raise ValueError(f"Expected a string at {self.buf[self.pos:self.pos + 20]!r}")
+        return json.loads(self._match(STRING_RE))
+
+    def value(self):
+        """Consume and return a string or scalar value."""
+        if self.peek() == '"':
+            return self.string()
+        return json.loads(self._match(SCALAR_RE))
+
+    def skip(self):
+        """Consume a value of any kind without building it."""
+        char = self.peek()
+        if char == '"':
+            self._match(STRING_RE)
+            return
+        if char not in '{[':
+            self._match(SCALAR_RE)
+            return
+        # Containers within the buffer are skipped by the C decoder; only
+        # those spanning it (the whole list of transactions, ...) are walked.
+        try:
+            _, self.pos = DECODER.raw_decode(self.buf, self.pos)
+            return
+        except ValueError:
+            pass
+        if char == '{':
+            for _ in self.members():
+                self.skip()
+        else:
+            for _ in self.elements():
+                self.skip()
+
+    def members(self):
+        """Yield the keys of an object, leaving each value to the caller."""
+        self._expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.string()
+            self._expect(':')
+            yield key
+            if self.peek() == '}':
+                self.pos += 1
+                return
+            self._expect(',')
+
+    def elements(self):
+        """Yield once per element of an array, leaving it to the caller."""
+        self._expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            self._expect(',')
@@ -0,0 +1,20 @@
+import heapq
+
+from beancount.core import data
+
+
+def merge_entries(*streams):
+    """Merge already-sorted streams of entries into one sorted list.
+
+    Importers often produce several runs of entries that are each sorted on
+    their own (the transactions of each statement, its balance).
+    A heap-based k-way merge combines them in O(n log k) instead of sorting
+    the concatenation again. Entries comparing equal keep the order of the
+    streams they came from, as a stable sort of the concatenation would.
+
+    Args:
+      streams: Iterables of entries, each sorted by data.entry_sortkey.
+    Returns:
+      A list of entries sorted by data.entry_sortkey.
+    """
+    return list(heapq.merge(*streams, key=data.entry_sortkey))
@@ -0,0 +1,258 @@
+"""Helpers shared by the OFX importers."""
+import codecs
+import collections
+import contextlib
+import datetime
+import html
+import mmap
+import os
+import re
+
+from xml.sax import saxutils
+
+from beancount.core.number import D
+
+
+# Memo of parsed YYYYMMDD prefixes. Statements span a few hundred distinct
+# dates at most, so this stays small; it is reset if it ever grows too large.
+_DATE_CACHE = {}
+_DATE_CACHE_MAX = 4096
+
+
+def parse_ofx_date(date_str):
+    """Parse the date part of an OFX time string.
+
+    Accepts any of the YYYYMMDD[HHMMSS[.XXX]][TZ] forms and looks only at the
+    leading 8 characters, which are memoized.
+
+    Args:
+      date_str: A string, the date to be parsed.
+    Returns:
+      A datetime.date instance.
+    """
+    key = date_str[:8]
+    try:
+        return _DATE_CACHE[key]
+    except KeyError:
+        pass
+    if len(key) != 8 or not (key.isascii() and key.isdigit()):
+        raise ValueError(f"Invalid OFX date: {date_str!r}")
+    value = datetime.date(int(key[:4]), int(key[4:6]), int(key[6:8]))
+    if len(_DATE_CACHE) >= _DATE_CACHE_MAX:
+        _DATE_CACHE.clear()
+    _DATE_CACHE[key] = value
+    return value
+
+
+def parse_ofx_time(date_str):
+    """Parse an OFX time string and return a datetime object.
+
+    Fractional seconds and the [offset:TZ] suffix are ignored, as before.
+
+    Args:
+      date_str: A string, the date to be parsed.
+    Returns:
+      A datetime.datetime instance.
+    """
+    date = parse_ofx_date(date_str)
+    if len(date_str) < 14:
+        return datetime.datetime(date.year, date.month, date.day)
+    hms = date_str[8:14]
+    if not (hms.isascii() and hms.isdigit()):
+        raise ValueError(f"Invalid OFX time: {date_str!r}")
+    return datetime.datetime(date.year, date.month, date.day,
+                             int(hms[:2]), int(hms[2:4]), int(hms[4:6]))
+
+
+# Bytes-level reading of OFX files.
+#
+# The importers map the file into memory and locate aggregates with byte
+# regexes, decoding only the handful of field values they turn into entries.
+# OFX 1.x (SGML) leaves leaf elements unclosed, so a field value runs up to
+# the next tag.
+
+HEADER_LIMIT = 1024
+HEADER_RE = re.compile(rb'^\s*(ENCODING|CHARSET)\s*:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+XML_ENCODING_RE = re.compile(rb'<\?xml[^>]*\bencoding\s*=\s*["\']([\w.:-]+)', re.IGNORECASE)
+CHARSETS = {
+    b'1252': 'cp1252',
+    b'ISO-8859-1': 'latin-1',
+    b'8859-1': 'latin-1',
+}
+DEFAULT_ENCODING = 'utf-8'
+
+ACCTID_RE = re.compile(rb'<ACCTID>([^<]*)', re.IGNORECASE)
+STMTRS_RE = re.compile(rb'<(\w*STMTRS)>(.*?)</\1>', re.IGNORECASE | re.DOTALL)
+STMTTRN_RE = re.compile(rb'<STMTTRN>.*?</STMTTRN>', re.IGNORECASE | re.DOTALL)
+LEDGERBAL_RE = re.compile(rb'<LEDGERBAL>(.*?)</LEDGERBAL>', re.IGNORECASE | re.DOTALL)
+FIELD_RE = re.compile(rb'<(\w+)>([^<]*)', re.IGNORECASE)
+
+
+@contextlib.contextmanager
+def open_ofx(filepath):
+    """Map an OFX file read-only into memory.
+
+    Yields a bytes-like object supporting regex search and slicing. Matches
+    must not be kept past the end of the block.
+    """
+    with open(filepath, 'rb') as fd:
+        if os.fstat(fd.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            yield contents
+
+
+def detect_encoding(contents):
+    """Return the codec for field values from the OFX header.
+
+    OFX 1.x declares ENCODING (USASCII or UTF-8) and a CHARSET code page in
+    its plain-text header; OFX 2.x uses the XML declaration.
+
+    Args:
+      contents: A bytes-like object, the OFX file.
+    Returns:
+      A Python codec name.
+    """
+    head = contents[:HEADER_LIMIT]
+    match = XML_ENCODING_RE.search(head)
+    if match:
+        return _codec(match.group(1))
+    header = {key.upper(): value.upper() for key, value in HEADER_RE.findall(head)}
+    if header.get(b'ENCODING') in (b'UTF-8', b'UTF8'):
+        return DEFAULT_ENCODING
+    charset = header.get(b'CHARSET')
+    if charset in CHARSETS:
+        return CHARSETS[charset]
+    if charset and charset != b'NONE':
+        return _codec(charset)
+    return DEFAULT_ENCODING
+
+
+def _codec(name):
+    try:
+        return codecs.lookup(name.decode('ascii')).name
+    except (LookupError, UnicodeDecodeError):
+        return DEFAULT_ENCODING
+
+
+def find_acctids(contents):
+    """Find the list of <ACCTID> tags.
+
+    Args:
+      contents: A bytes-like object, the OFX file.
+    Returns:
+      A list of strings, the contents of the <ACCTID> tags.
+    """
+    # Match the account id. Don't bother parsing the entire thing, just match
+    # the tag for this purpose. Account ids are plain ASCII.
+    return [match.group(1).decode('ascii', 'replace') for match in ACCTID_RE.finditer(contents)]
+
+
+def find_max_date(contents):
+    """Extract the report date (latest <LEDGERBAL> <DTASOF>) from the file."""
+    dates = []
+    for ledgerbal in LEDGERBAL_RE.finditer(contents):
+        fields = _fields(contents, ledgerbal.span(1), 'ascii', ('dtasof',))
+        if 'dtasof' in fields:
+            dates.append(parse_ofx_date(fields['dtasof']))
+    if dates:
+        return max(dates)
+
+
+# An OFX statement (<STMTRS>, <CCSTMTRS>, ...) located in the file.
+#   acctid: The <ACCTID> string.
+#   currency: The <CURDEF> string.
+#   transactions: A list of (start, end) offsets of the <STMTTRN> records.
+#   balance: A (date, amount) pair for the <LEDGERBAL>, or None.
+Statement = collections.namedtuple('Statement', 'acctid currency transactions balance')
+
+# The fields of a <STMTTRN> used to build a transaction. Plain values, so that
+# records can be returned from worker processes.
+StmtTrn = collections.namedtuple('StmtTrn', 'date payee trntype number')
+STMTTRN_FIELDS = ('dtposted', 'name', 'trntype', 'trnamt')
+
+
+def find_statements(contents, encoding):
+    """Find the statements in the file.
+
+    Args:
+      contents: A bytes-like object, the OFX file.
+      encoding: The codec returned by detect_encoding().
+    Returns:
+      A list of Statement tuples, in file order.
+    """
+    statements = []
+    for stmtrs in STMTRS_RE.finditer(contents):
+        span = stmtrs.span(2)
+        fields = _fields(contents, span, encoding, ('curdef', 'acctid'))
+        if 'curdef' not in fields:
+            continue
+
+        balance = None
+        ledgerbal = LEDGERBAL_RE.search(contents, *span)
+        if ledgerbal:
+            balfields = _fields(contents, ledgerbal.span(1), encoding, ('dtasof', 'balamt'))
+            balance = (parse_ofx_date(balfields['dtasof']), D(balfields['balamt']))
+
+        transactions = [match.span() for match in STMTTRN_RE.finditer(contents, *span)]
+        statements.append(Statement(
+            fields.get('acctid', ''), fields['curdef'], transactions, balance))
+    return statements
+
+
+def read_stmttrn(contents, span, encoding):
+    """Read the fields of a single transaction.
+
+    Args:
+      contents: A bytes-like object, the OFX file.
+      span: The (start, end) offsets of the <STMTTRN> record.
+      encoding: The codec returned by detect_encoding().
+    Returns:
+      A StmtTrn instance.
+    """
+    fields = _fields(contents, span, encoding, STMTTRN_FIELDS)
+    name = fields.get('name')
+    trntype = fields.get('trntype')
+    trnamt = fields.get('trnamt')
+    return StmtTrn(
+        parse_ofx_date(fields['dtposted']),
+        _unescape(name) if name is not None else None,
+        _unescape(trntype) if trntype is not None else None,
+        D(trnamt) if trnamt is not None else None)
+
+
+def read_stmttrn_chunk(filepath, encoding, spans):
+    """Read a chunk of transactions from an OFX file (runs in a worker process).
+
+    Args:
+      filepath: The path of the OFX file.
+      encoding: The codec returned by detect_encoding().
+      spans: A list of (start, end) offsets of <STMTTRN> records.
+    Returns:
+      A list of StmtTrn tuples, one per span.
+    """
+    with open_ofx(filepath) as contents:
+        return [read_stmttrn(contents, span, encoding) for span in spans]
+
+
+def _fields(contents, span, encoding, tags):
+    """Decode the first value of each of the given (lowercase) tags within span.
+
+    Only the values of the requested tags are copied out and decoded, and the
+    scan stops as soon as all of them have been seen.
+    """
+    fields = {}
+    for match in FIELD_RE.finditer(contents, *span):
+        tag = match.group(1).lower().decode('ascii')
+        if tag in tags and tag not in fields:
+            fields[tag] = match.group(2).decode(encoding, 'replace').strip()
+            if len(fields) == len(tags):
+                break
+    return fields
+
+
+def _unescape(value):
+    # Entities are decoded twice, as the previous HTML parser followed by
+    # saxutils.unescape did, for files that double-escape ampersands.
+    return saxutils.unescape(html.unescape(value))
@@ -0,0 +1,271 @@
+"""Cheap pre-identification of PDF statements.
+
+Every PDF importer gets asked about every PDF in the downloads folder, and
+text extraction is expensive. Before extracting, an importer can ask whether
+the document is plausibly from its institution. The answer is computed from
+the document information dictionary (Title, Producer, ...) and the strings
+shown by the first page's content stream, both read straight from the file
+bytes, and shared by all importers through a per-file cache.
+
+A document is only ruled out when it names exactly one other institution;
+anything ambiguous (several institutions named, text shown through hex
+strings only, encrypted, image-only, or exotic stream filters) is left for
+the full identify() to decide.
+"""
+import contextlib
+import functools
+import mmap
+import os
+import re
+import zlib
+
+from beancount_utils.filecache import per_file
+
+
+# Markers naming each institution, matched case-sensitively as whole words
+# against the metadata and first page strings. Importers for other
+# institutions can add theirs.
+MARKERS = {
+    'chase': (b'Chase', b'CHASE'),
+    'fidelity': (b'Fidelity', b'FIDELITY'),
+    'transamerica': (b'Transamerica', b'TRANSAMERICA'),
+    'wealthfront': (b'Wealthfront', b'WEALTHFRONT'),
+}
+
+INFO_KEYS = (b'Title', b'Author', b'Subject', b'Creator', b'Producer')
+
+# Decompressed bytes of any stream looked at.
+STREAM_LIMIT = 4 * 1024 * 1024
+
+# Levels of the page tree followed down to the first page.
+TREE_DEPTH = 16
+
+INFO_REF_RE = re.compile(rb'/Info\s+(\d+)\s+\d+\s+R')
+ROOT_REF_RE = re.compile(rb'/Root\s+(\d+)\s+\d+\s+R')
+PAGES_REF_RE = re.compile(rb'/Pages\s+(\d+)\s+\d+\s+R')
+KIDS_REF_RE = re.compile(rb'/Kids\s*\[\s*(\d+)\s+\d+\s+R')
+CONTENTS_RE = re.compile(rb'/Contents\s*(\[[^\]]*\]|\d+\s+\d+\s+R)')
+REF_RE = re.compile(rb'(\d+)\s+\d+\s+R')
+OBJSTM_RE = re.compile(rb'/Type\s*/ObjStm\b')
+FIRST_RE = re.compile(rb'/First\s+(\d+)')
+FILTER_RE = re.compile(rb'/Filter\s*(\[[^\]]*\]|/\w+)')
+STREAM_RE = re.compile(rb'stream\r?\n')
+INFO_VALUE_RE = re.compile(rb'/(\w+)\s*(\((?:[^()\\]|\\.)*\)|<[0-9A-Fa-f\s]*>)', re.DOTALL)
+LITERAL_RE = re.compile(rb'\(((?:[^()\\]|\\.)*)\)', re.DOTALL)
+# A TJ array of literal strings and kerning, or a string shown on its own.
+SHOWN_RE = re.compile(rb'\[((?:\((?:[^()\\]|\\.)*\)|[^\[\]()])*)\]|\(((?:[^()\\]|\\.)*)\)', re.DOTALL)
+HEX_STRING_RE = re.compile(rb'<[0-9A-Fa-f\s]+>\s*(?:Tj|\'|")|<[0-9A-Fa-f\s]+>[^\]]*\]\s*TJ')
+ESCAPE_RE = re.compile(rb'\\([0-7]{1,3}|.)', re.DOTALL)
+ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+
+
+def plausible(filepath, institution):
+    """Return False if the PDF is evidently from another institution.
+
+    Args:
+      filepath: Path of the PDF.
+      institution: A key of MARKERS.
+    Returns:
+      True unless the document names exactly one institution, another one.
+    """
+    found = institutions(filepath)
+    return len(found) != 1 or institution in found
+
+
+def institutions(filepath):
+    """Return the set of MARKERS keys named in the document's head."""
+    text = sniff(filepath)
+    return {name for name, markers in MARKERS.items()
+            if _marker_re(markers).search(text)}
+
+
+@functools.lru_cache(maxsize=None)
+def _marker_re(markers):
+    return re.compile(rb'\b(?:' + b'|'.join(re.escape(m) for m in markers) + rb')\b')
+
+
+@per_file(maxsize=64)
+def sniff(filepath):
+    """Return the metadata values and first page strings of a PDF, as bytes.
+
+    Strings are raw bytes in the document's encoding; the markers are ASCII.
+    Returns b'' if the file can't be read this way, or if the first page
+    shows text that can't be read this way.
+    """
+    try:
+        with _open(filepath) as contents:
+            if contents[:5] != b'%PDF-':
+                return b''
+            document = _Document(contents)
+            strings = content_strings(document)
+            if strings is None:
+                return b''
+            return b'\n'.join(info_values(document) + strings)
+    except (OSError, ValueError, zlib.error):
+        return b''
+
+
+@contextlib.contextmanager
+def _open(filepath):
+    with open(filepath, 'rb') as fd:
+        if os.fstat(fd.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            yield contents
+
+
+class _Document:
+    """Finds objects in the raw file bytes, or in its object streams.
+
+    PDF 1.5 writers may pack page and info dictionaries into compressed
+    object streams; those are only decompressed if an object isn't found
+    in the open.
+    """
+
+    def __init__(self, contents):
+        self.contents = contents
+        self._packed = None
+
+    def get(self, number):
+        """Return the bytes of object `number` up to its endobj, or None."""
+        contents = self.contents
+        match = re.search(rb'(?<![\d.])' + number + rb'\s+\d+\s+obj\b', contents)
+        if match:
+            end = contents.find(b'endobj', match.end())
+            return contents[match.end():end if end >= 0 else None]
+        return self.packed().get(int(number))
+
+    def packed(self):
+        if self._packed is None:
+            self._packed = {}
+            for match in OBJSTM_RE.finditer(self.contents):
+                self._packed.update(_unpack(self.contents, match))
+        return self._packed
+
+
+def _unpack(contents, match):
+    """Return {number: bytes} of the objects in the object stream at match."""
+    start = contents.rfind(b'obj', 0, match.start())
+    end = contents.find(b'endobj', match.end())
+    header, data = _stream(contents[start:end if end >= 0 else None])
+    first = FIRST_RE.search(header)
+    if not data or first is None:
+        return {}
+    first = int(first.group(1))
+    pairs = [int(n) for n in data[:first].split()]
+    numbers, offsets = pairs[0::2], [first + o for o in pairs[1::2]]
+    return {number: data[offset:next_offset] for number, offset, next_offset
+            in zip(numbers, offsets, offsets[1:] + [len(data)])}
+
+
+def _stream(body):
+    """Split an object into its dictionary and decoded stream data.
+
+    The data is None if missing or compressed with anything but Flate.
+    """
+    stream = STREAM_RE.search(body)
+    end = body.rfind(b'endstream')
+    if stream is None or end < stream.end():
+        return body, None
+    header, data = body[:stream.start()], body[stream.end():end]
+    filters = FILTER_RE.search(header)
+    if filters is None:
+        return header, data[:STREAM_LIMIT]
+    if re.findall(rb'/(\w+)', filters.group(1)) != [b'FlateDecode'] or b'/DecodeParms' in header:
+        return header, None
+    return header, zlib.decompressobj().decompress(data, STREAM_LIMIT)
+
+
+def info_values(document):
+    """Return the INFO_KEYS string values of the trailer's /Info dictionary."""
+    # The last trailer wins for incrementally updated files.
+    ref = None
+    for match in INFO_REF_RE.finditer(document.contents):
+        ref = match.group(1)
+    body = document.get(ref) if ref else None
+    if body is None:
+        return []
+    end = body.find(b'>>')
+    values = []
+    for key, value in INFO_VALUE_RE.findall(body if end < 0 else body[:end]):
+        if key in INFO_KEYS:
+            values.append(_decode(_string(value)))
+    return values
+
+
+def content_strings(document):
+    """Return the literal strings shown by the first page's content streams.
+
+    The first page is found by following the catalog's page tree down its
+    first kids. The pieces of a TJ array are joined, so kerned words come
+    out whole. Returns None if the page shows hex strings only, typically
+    glyph ids of an embedded font that can't be matched without the font.
+    """
+    data = b''.join(_stream(body)[1] or b'' for body in _first_page_contents(document))
+    strings = []
+    for array, literal in SHOWN_RE.findall(data):
+        pieces = LITERAL_RE.findall(array) if array else [literal]
+        if pieces:
+            strings.append(b''.join(_unescape(piece) for piece in pieces))
+    if not strings and HEX_STRING_RE.search(data):
+        return None
+    return strings
+
+
+def _first_page_contents(document):
+    """Return the bodies of the content streams of the first page."""
+    ref = None
+    for match in ROOT_REF_RE.finditer(document.contents):
+        ref = match.group(1)
+    node = document.get(ref) if ref else None
+    match = PAGES_REF_RE.search(node) if node is not None else None
+    node = document.get(match.group(1)) if match else None
+    for _ in range(TREE_DEPTH):
+        if node is None:
+            return []
+        kid = KIDS_REF_RE.search(node)
+        if kid is None:
+            break
+        node = document.get(kid.group(1))
+    else:
+        return []
+    contents = CONTENTS_RE.search(node)
+    if contents is None:
+        return []
+    refs = REF_RE.findall(contents.group(1))
+    if len(refs) == 1 and not contents.group(1).startswith(b'['):
+        # An indirect array of streams.
+        body = document.get(refs[0])
+        if body is not None and body.lstrip().startswith(b'['):
+            refs = REF_RE.findall(body)
+    bodies = (document.get(ref) for ref in refs)
+    return [body for body in bodies if body is not None]
+
+
+def _string(token):
+    if token.startswith(b'<'):
+        digits = re.sub(rb'\s', b'', token[1:-1])
+        if len(digits) % 2:
+            digits += b'0'
+        return bytes.fromhex(digits.decode('ascii'))
+    return _unescape(token[1:-1])
+
+
+def _unescape(value):
+    if b'\\' not in value:
+        return value
+
+    def replace(match):
+        escape = match.group(1)
+        if escape[:1].isdigit():
+            return bytes([int(escape, 8) & 0xff])
+        return ESCAPES.get(escape, b'' if escape in b'\r\n' else escape)
+    return ESCAPE_RE.sub(replace, value)
+
+
+def _decode(value):
+    # Text strings are PDFDocEncoding or UTF-16BE with a byte order mark.
+    if value.startswith(b'\xfe\xff'):
+        return value[2:].decode('utf-16-be', 'replace').encode('utf-8')
+    return value
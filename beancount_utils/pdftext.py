@@ -0,0 +1,318 @@
+"""Per-page PDF text extraction with a persistent cache.
+
+Layout analysis dominates the cost of the PDF importers, and the same
+statements get identified and extracted over and over as a downloads folder
+is re-imported. Extracted page text is cached under the SHA-256 of the file
+contents and the extractor name and version, and filled in lazily:
+identify() typically asks for the first page only, extract() for the rest.
+
+By default the cache only lasts for the run. To keep it on disk across runs,
+set $BEANCOUNT_UTILS_CACHE to a directory, or call setup_cache() from the
+import configuration, e.g. with user_cache_dir(), beancount-utils/pdftext
+under $XDG_CACHE_HOME (~/.cache).
+
+Page text can also be replayed from a fixture, a text file with the pages
+separated by PAGE_BREAK, to develop and benchmark parsers without PDF
+decoding. Only importers created with text_backend='replay' identify
+*.pages.txt fixtures, instead of PDFs, so a fixture left next to its PDF
+is never imported twice. To write fixtures:
+
+    python -m beancount_utils.pdftext [--backend NAME] statement.pdf...
+"""
+import argparse
+import collections
+import hashlib
+import json
+import math
+import os
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+
+from beancount_utils.filecache import per_file
+
+
+# Bump when a change here alters extracted text, to invalidate old entries.
+CACHE_VERSION = 1
+
+# Below this many pages to extract, a process pool costs more than it saves.
+PARALLEL_MIN_PAGES = 4
+
+
+# A way of turning PDF pages into text.
+#   name: A short identifier, part of the cache key.
+#   version: A callable returning the version string of the backing library.
+#   extract: A callable (filepath, indices) -> (page count, {index: text}),
+#     extracting all pages if indices is None and skipping indices past the
+#     end of the document.
+#   cache: Whether extracted text is worth keeping in the page cache.
+Extractor = collections.namedtuple('Extractor', 'name version extract cache', defaults=(True,))
+
+PAGE_BREAK = '\n\n===PAGE BREAK===\n\n'
+FIXTURE_SUFFIX = '.pages.txt'
+
+
+def _plumber_version():
+    import pdfplumber
+    return pdfplumber.__version__
+
+
+def _plumber_extract(filepath, indices):
+    import pdfplumber
+    with pdfplumber.open(filepath) as pdf:
+        count = len(pdf.pages)
+        indices = range(count) if indices is None else [i for i in indices if i < count]
+        return count, {i: pdf.pages[i].extract_text() or "" for i in indices}
+
+
+def _pypdf_version():
+    import pypdf
+    return pypdf.__version__
+
+
+def _pypdf_extract(filepath, indices):
+    from pypdf import PdfReader
+    reader = PdfReader(filepath)
+    count = len(reader.pages)
+    indices = range(count) if indices is None else [i for i in indices if i < count]
+    return count, {i: reader.pages[i].extract_text() for i in indices}
+
+
+PDFPLUMBER = Extractor('pdfplumber', _plumber_version, _plumber_extract)
+PYPDF = Extractor('pypdf', _pypdf_version, _pypdf_extract)
+
+
+def is_fixture(filepath):
+    return filepath.endswith(FIXTURE_SUFFIX)
+
+
+def fixture_path(filepath):
+    """Return the page text fixture for a PDF, or the fixture itself."""
+    return filepath if is_fixture(filepath) else filepath + FIXTURE_SUFFIX
+
+
+def read_fixture(filepath):
+    with open(fixture_path(filepath), encoding='utf-8') as f:
+        return f.read().split(PAGE_BREAK)
+
+
+def write_fixture(filepath, pages):
+    with open(fixture_path(filepath), 'w', encoding='utf-8') as f:
+        f.write(PAGE_BREAK.join(pages))
+
+
+def _replay_extract(filepath, indices):
+    pages = read_fixture(filepath)
+    count = len(pages)
+    indices = range(count) if indices is None else [i for i in indices if i < count]
+    return count, {i: pages[i] for i in indices}
+
+
+# Reads the fixture instead of the PDF. Nothing to gain from caching it.
+REPLAY = Extractor('replay', lambda: '1', _replay_extract, cache=False)
+
+# Text backends by name. Each importer declares the one its parsers were
+# written against as `text_backend`, which can be overridden per instance;
+# bench/bench_pdf_backends.py compares them.
+BACKENDS = {extractor.name: extractor for extractor in (PDFPLUMBER, PYPDF, REPLAY)}
+
+
+def backend(name):
+    """Return the Extractor registered under name."""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown PDF text backend {name!r}, expected one of {sorted(BACKENDS)}") from None
+
+
+def accepts(filepath, mimetype, name):
+    """Whether an importer reading text with backend name should identify filepath.
+
+    The replay backend reads page text fixtures, the others PDFs.
+    """
+    if name == REPLAY.name:
+        return is_fixture(filepath)
+    return mimetype == 'application/pdf'
+
+
+def register_backend(extractor):
+    """Make an Extractor available to importers under its name."""
+    BACKENDS[extractor.name] = extractor
+
+
+def default_cache_dir():
+    """Return $BEANCOUNT_UTILS_CACHE, or None to keep the cache in memory."""
+    return os.environ.get('BEANCOUNT_UTILS_CACHE') or None
+
+
+def user_cache_dir():
+    """Return the per-user cache directory, to pass to setup_cache()."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'beancount-utils', 'pdftext')
+
+
+class PageCache:
+    """Extracted page text, kept in memory and optionally on disk.
+
+    Each (document, extractor) pair is one JSON file holding the page count
+    and the text of the pages extracted so far.
+    """
+
+    # Documents kept in memory, enough for identify() and extract() of a run.
+    memory_size = 32
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.memory = collections.OrderedDict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, '{}-{}-{}-v{}.json'.format(*key, CACHE_VERSION))
+
+    def load(self, key):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        record = {'count': None, 'pages': {}}
+        if self.directory:
+            try:
+                with open(self._path(key)) as f:
+                    stored = json.load(f)
+                record = {'count': stored['count'],
+                          'pages': {int(i): t for i, t in stored['pages'].items()}}
+            except (OSError, ValueError, KeyError):
+                pass
+        self._remember(key, record)
+        return record
+
+    def _remember(self, key, record):
+        self.memory[key] = record
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def save(self, key, record):
+        self._remember(key, record)
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename, so concurrent imports never see a partial file.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(record, f)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def pages(self, filepath, extractor, indices=None, workers=None):
+        """Return the text of the given pages, extracting only those missing.
+
+        Args:
+          filepath: Path of the PDF.
+          extractor: An Extractor.
+          indices: Page indices to return, or None for all pages. Indices
+            past the end of the document are ignored.
+          workers: Optional number of processes to extract missing pages with.
+        Returns:
+          A list of strings, one per existing requested page.
+        """
+        if not extractor.cache:
+            count, extracted = extractor.extract(filepath, indices)
+            wanted = range(count) if indices is None else indices
+            return [extracted[i] for i in wanted if i in extracted]
+
+        key = (content_hash(filepath), extractor.name, extractor.version())
+        record = self.load(key)
+        count = record['count']
+        if count is None:
+            # Never seen this document; the extractor also finds the page count.
+            request = None if indices is None else list(indices)
+        else:
+            wanted = range(count) if indices is None else indices
+            request = [i for i in wanted if i < count and i not in record['pages']]
+
+        if count is None or request:
+            count, extracted = extract_pages(filepath, extractor, request, workers)
+            record = {'count': count, 'pages': {**record['pages'], **extracted}}
+            self.save(key, record)
+
+        wanted = range(count) if indices is None else [i for i in indices if i < count]
+        return [record['pages'][i] for i in wanted]
+
+
+def extract_pages(filepath, extractor, indices=None, workers=None):
+    """Extract pages, fanning them out to a process pool if worthwhile.
+
+    Each worker opens the PDF itself and extracts a contiguous run of pages;
+    the results are reassembled by page index. Small requests, or workers of
+    None or 1, extract serially in this process.
+
+    Args:
+      filepath: Path of the PDF.
+      extractor: An Extractor.
+      indices: Page indices to extract, or None for all pages.
+      workers: Optional number of worker processes.
+    Returns:
+      A (page count, {index: text}) pair, as Extractor.extract.
+    """
+    if not workers or workers < 2:
+        return extractor.extract(filepath, indices)
+    if indices is None:
+        # Only open the document to count its pages.
+        count, _ = extractor.extract(filepath, [])
+        indices = range(count)
+    else:
+        count = None
+        indices = list(indices)
+    if len(indices) < PARALLEL_MIN_PAGES:
+        return extractor.extract(filepath, indices)
+
+    size = math.ceil(len(indices) / workers)
+    chunks = [indices[i:i + size] for i in range(0, len(indices), size)]
+    pages = {}
+    with ProcessPoolExecutor(min(workers, len(chunks))) as pool:
+        for count, extracted in pool.map(extractor.extract, [filepath] * len(chunks), chunks):
+            pages.update(extracted)
+    return count, pages
+
+
+@per_file(maxsize=64)
+def content_hash(filepath):
+    """SHA-256 of the file contents, computed once per file version."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_cache = PageCache(default_cache_dir())
+
+
+def setup_cache(directory):
+    """Use the given cache directory, or keep extracted text in memory only if None."""
+    global _cache
+    _cache = PageCache(directory)
+
+
+def get_pages(filepath, extractor, indices=None, workers=None):
+    """Return the text of pages of a PDF through the shared cache.
+
+    See PageCache.pages().
+    """
+    return _cache.pages(filepath, extractor, indices, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write page text fixtures next to PDFs.")
+    parser.add_argument('--backend', default='pdfplumber', choices=sorted(set(BACKENDS) - {REPLAY.name}))
+    parser.add_argument('pdfs', nargs='+')
+    args = parser.parse_args()
+    for filepath in args.pdfs:
+        write_fixture(filepath, get_pages(filepath, backend(args.backend)))
+        print(fixture_path(filepath))
+
+
+if __name__ == '__main__':
+    main()
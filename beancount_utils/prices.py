@@ -0,0 +1,121 @@
+"""Price lookups through beanprice for importers that need costs.
+
+Jobs are beanprice DatedPrice tuples. Those already answered by a Price
+directive of the ledger are served from a PriceMemo; the others are fetched
+concurrently from a bounded thread pool, the way `bean-price` does, with an
+optional limit on the rate of calls made to each price source.
+"""
+import bisect
+import datetime
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from beancount.core import data
+from beanprice import price as beanprice
+
+
+DEFAULT_WORKERS = 8
+
+
+class RateLimiter:
+    """Space calls out to at most `rate` per second, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class PriceMemo:
+    """An index of Price entries by currency, quote currency and date.
+
+    A lookup with no Price on the date falls back to the nearest date at most
+    `tolerance` days away, the earlier one on a tie.
+    """
+
+    def __init__(self, entries=(), tolerance=0):
+        self.tolerance = datetime.timedelta(days=tolerance)
+        self.prices = {}  # (currency, quote, date) -> Price
+        self.dates = {}   # (currency, quote) -> sorted list of dates
+        for entry in entries:
+            if isinstance(entry, data.Price):
+                self.add(entry)
+
+    def add(self, price):
+        pair = (price.currency, price.amount.currency)
+        if (*pair, price.date) not in self.prices:
+            bisect.insort(self.dates.setdefault(pair, []), price.date)
+        self.prices[(*pair, price.date)] = price
+
+    def lookup(self, currency, quote, date):
+        price = self.prices.get((currency, quote, date))
+        if price or not self.tolerance:
+            return price
+        dates = self.dates.get((currency, quote), ())
+        i = bisect.bisect_left(dates, date)
+        candidates = [d for d in dates[max(i - 1, 0):i + 1] if abs(d - date) <= self.tolerance]
+        if not candidates:
+            return None
+        nearest = min(candidates, key=lambda d: (abs(d - date), d))
+        return self.prices[(currency, quote, nearest)]
+
+    def split(self, jobs):
+        """Split jobs into those answered here and those left to fetch.
+
+        Args:
+          jobs: A dict of key -> beanprice.DatedPrice, with base and quote set.
+        Returns:
+          A pair of dicts, key -> Price found, and key -> DatedPrice missing.
+        """
+        found, missing = {}, {}
+        for key, dprice in jobs.items():
+            price = self.lookup(dprice.base, dprice.quote, dprice.date)
+            if price:
+                found[key] = price
+            else:
+                missing[key] = dprice
+        return found, missing
+
+
+def source_name(dprice):
+    """Name of the primary source of a job: its module name without package."""
+    if not dprice.sources:
+        return None
+    return dprice.sources[0].module.__name__.rsplit('.', 1)[-1]
+
+
+def fetch_prices(jobs, fetch=None, workers=DEFAULT_WORKERS, rate_limits=None):
+    """Fetch prices for many jobs concurrently.
+
+    Args:
+      jobs: A dict of key -> beanprice.DatedPrice, one per distinct price.
+      fetch: The function fetching one job, beanprice.fetch_price by default.
+      workers: Maximum number of concurrent fetches.
+      rate_limits: Optional dict of source name (e.g. 'coinbase', see
+        source_name()) -> maximum calls per second to that source.
+    Returns:
+      A dict of key -> the beancount Price returned by fetch, or None.
+    """
+    if not jobs:
+        return {}
+    fetch = fetch or beanprice.fetch_price
+    limiters = {name: RateLimiter(rate) for name, rate in (rate_limits or {}).items()}
+
+    def run(dprice):
+        limiter = limiters.get(source_name(dprice))
+        if limiter:
+            limiter.wait()
+        return fetch(dprice)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return dict(zip(jobs, pool.map(run, jobs.values())))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""Benchmark: JSON importers under each jsonload backend.
+
+Writes a large synthetic Kraken ledger export and SimpleFIN bridge dump,
+then times jsonload.load() and the importers' extract() on them with every
+installed backend. Entries must be identical whatever the backend.
+
+    python -m bench.bench_json [--rows N] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from beancount_utils import jsonload
+from beancount_utils.importers import kraken_ledger_json, simplefin
+
+
+def kraken_ledger(rows):
+    rng = random.Random(0)
+    ledger = {}
+    time = 1600000000.0
+    while len(ledger) < rows:
+        time += rng.randint(60, 86400) + 0.25
+        refid = f'R{len(ledger)}'
+        if rng.random() < 0.5:
+            asset = rng.choice(('XETH', 'XXBT', 'DOT.S'))
+            legs = ((asset, f'{rng.randint(1, 99999) / 10000:.4f}', 'staking'),)
+        else:
+            asset = rng.choice(('XETH', 'XXBT', 'SOL03'))
+            units = rng.randint(1, 99999) / 10000
+            legs = (('ZUSD', f'{-units * 1000:.2f}', 'trade'), (asset, f'{units:.4f}', 'trade'))
+        for asset, amount, kind in legs:
+            ledger[f'L{len(ledger):08d}'] = {
+                'refid': refid, 'time': time, 'type': kind, 'subtype': '', 'aclass': 'currency',
+                'asset': asset, 'amount': amount, 'fee': '0.0000', 'balance': f'{rng.random() * 100:.4f}',
+            }
+    return {'error': [], 'result': {'ledger': ledger, 'count': len(ledger)}}
+
+
+def simplefin_dump(rows, accounts=5):
+    rng = random.Random(0)
+    return {'errors': [], 'accounts': [
+        {'id': f'ACT-{a}', 'name': f'Account {a}', 'currency': 'USD', 'balance': '1000.00',
+         'org': {'name': 'Bank', 'domain': 'bank.example'},
+         'transactions': [
+             {'id': f'TRN-{a}-{i}', 'posted': 1600000000 + 3600 * i, 'amount': f'{rng.uniform(-500, 500):.2f}',
+              'description': f'POS PURCHASE    MERCHANT {rng.randint(1, 500)}', 'payee': 'Merchant', 'memo': ''}
+             for i in range(rows // accounts)
+         ]}
+        for a in range(accounts)
+    ]}
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=200000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ledger = os.path.join(tmpdir, 'ledger.json')
+        with open(ledger, 'w') as f:
+            json.dump(kraken_ledger(args.rows), f)
+        dump = os.path.join(tmpdir, 'simplefin.json')
+        with open(dump, 'w') as f:
+            json.dump(simplefin_dump(args.rows), f)
+
+        cases = {
+            'kraken ledger': (ledger, kraken_ledger_json.Importer('Assets:Kraken')),
+            'simplefin': (dump, simplefin.Importer({f'ACT-{a}': f'Assets:Bank:{a}' for a in range(5)})),
+        }
+        print(f"{'export':<14} {'backend':<8} {'size':>7} {'load':>10} {'extract':>10}  identical")
+        for name, (filepath, importer) in cases.items():
+            size = os.path.getsize(filepath) / 1e6
+            reference = None
+            for backend in jsonload.available():
+                _, load = best_of(args.repeat, lambda: jsonload.load(filepath, backend))
+                jsonload.DEFAULT_BACKEND = backend
+
+                def run():
+                    simplefin.load_document.cache_clear()
+                    return importer.extract(filepath, [])
+                entries, extract = best_of(args.repeat, run)
+                reference = reference or entries
+                same = 'yes' if entries == reference else 'NO'
+                print(f"{name:<14} {backend:<8} {size:5.1f}MB {load * 1e3:8.1f}ms {extract * 1e3:8.1f}ms  {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+"""Microbenchmark: OFX timestamp parsing.
+
+Compares the fixed-width parser in beancount_utils.ofx against the previous
+strptime-based implementation over a statement-like mix of timestamps.
+
+    python -m bench.bench_ofx_time [--count N]
+"""
+
+import argparse
+import datetime
+import random
+import timeit
+
+from beancount_utils.ofx import parse_ofx_date, parse_ofx_time
+
+
+def strptime_parse_ofx_time(date_str):
+    """The strptime-based parser previously in ofx_bank/citi_ofx."""
+    if len(date_str) < 14:
+        return datetime.datetime.strptime(date_str[:8], '%Y%m%d')
+    return datetime.datetime.strptime(date_str[:14], '%Y%m%d%H%M%S')
+
+
+def make_timestamps(count, days=365, seed=0):
+    rng = random.Random(seed)
+    start = datetime.date(2024, 1, 1)
+    forms = [
+        '{:%Y%m%d}',
+        '{:%Y%m%d}120000',
+        '{:%Y%m%d}120000.000',
+        '{:%Y%m%d}120000.000[-5:EST]',
+    ]
+    return [
+        rng.choice(forms).format(start + datetime.timedelta(days=rng.randrange(days)))
+        for _ in range(count)
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--count', type=int, default=50000)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    stamps = make_timestamps(args.count)
+    for s in stamps:
+        assert parse_ofx_time(s) == strptime_parse_ofx_time(s), s
+
+    cases = [
+        ('strptime .date()', lambda: [strptime_parse_ofx_time(s).date() for s in stamps]),
+        ('parse_ofx_time', lambda: [parse_ofx_time(s) for s in stamps]),
+        ('parse_ofx_date', lambda: [parse_ofx_date(s) for s in stamps]),
+    ]
+    baseline = None
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"{name:<18} {best * 1e3:8.2f} ms  {baseline / best:6.1f}x  ({args.count} timestamps)")
+
+
+if __name__ == '__main__':
+    main()
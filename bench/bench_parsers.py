@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""Benchmark: PDF importer parsers on page text, without PDF decoding.
+
+Generates large synthetic statements as page text and times the Fidelity
+and Transamerica parsers on them, both called directly and through
+extract() replaying a page text fixture (see pdftext). PDF I/O is left out,
+so regex and state machine costs can be measured on their own; --profile
+shows where the time goes.
+
+    python -m bench.bench_parsers [--scale N] [--profile]
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import tempfile
+import timeit
+
+from beancount_utils import pdftext
+from beancount_utils.importers import fidelity_pdf, transamerica_pdf
+
+from bench.statements import fidelity_pages, transamerica_pages, transamerica_sources
+
+
+def cases(scale, tmpdir):
+    fidelity = ["\n".join(lines) for lines in fidelity_pages(
+        holdings=100 * scale, dividends=1000 * scale, trades=1000 * scale, transfers=200 * scale)]
+    fidelity_fixture = os.path.join(tmpdir, 'fidelity.pages.txt')
+    pdftext.write_fixture(fidelity_fixture, fidelity)
+    statement = fidelity_pdf.parse_statement(fidelity)
+    names = [row["name"] for row in statement.dividends + statement.trades]
+    fidelity_importer = fidelity_pdf.Importer('Assets:Fidelity', text_backend='replay')
+
+    plans = 10 * scale
+    transamerica = ["\n".join(lines) for lines in transamerica_pages(plans, 4)]
+    transamerica_fixture = os.path.join(tmpdir, 'transamerica.pages.txt')
+    pdftext.write_fixture(transamerica_fixture, transamerica)
+    transamerica_importer = transamerica_pdf.Importer(transamerica_sources(plans), text_backend='replay')
+
+    def resolve_all():
+        tickers = fidelity_pdf.TickerIndex({h["name"]: t for t, h in statement.holdings.items()})
+        return [tickers.resolve(name) for name in names]
+
+    return [
+        ('fidelity parse_statement', f"{len(fidelity)} pages",
+         lambda: fidelity_pdf.parse_statement(fidelity)),
+        ('fidelity TickerIndex', f"{len(names)} rows",
+         resolve_all),
+        ('fidelity extract (replay)', f"{len(fidelity)} pages",
+         lambda: fidelity_importer.extract(fidelity_fixture, [])),
+        ('transamerica _parse_rows', f"{len(transamerica)} pages",
+         lambda: transamerica_importer._parse_rows(transamerica)),
+        ('transamerica extract (replay)', f"{len(transamerica)} pages",
+         lambda: transamerica_importer.extract(transamerica_fixture, [])),
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--scale', type=int, default=1)
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--profile', action='store_true')
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, size, fn in cases(args.scale, tmpdir):
+            if args.profile:
+                print(f"== {name} ({size})")
+                profile = cProfile.Profile()
+                profile.runcall(fn)
+                pstats.Stats(profile).sort_stats('tottime').print_stats(8)
+                continue
+            best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+            print(f"{name:<30} {best * 1e3:8.2f} ms  ({size})")
+
+
+if __name__ == '__main__':
+    main()
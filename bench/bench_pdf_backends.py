@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""Benchmark: PDF importers under each pdftext text backend.
+
+Writes a synthetic statement for each PDF importer, then runs identify()
+and extract() on it with every registered backend, from a cold page cache.
+Reports the time taken and whether the result is identical to the one
+obtained with the importer's declared backend, the one its parsers were
+written against. An importer can move to a faster backend only if the
+result stays identical on real statements too: run this against your own
+files with --statement IMPORTER=PATH.
+
+(wealthfront_cash_pdf reads transactions through pypdf's font-aware
+callback regardless of backend, so it is not compared.)
+
+    python -m bench.bench_pdf_backends [--repeat N] [--statement fidelity=path.pdf ...]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from beancount_utils import pdftext
+from beancount_utils.importers import fidelity_pdf, pdf_chase_bank, transamerica_pdf
+
+from bench.statements import chase_pages, fidelity_pages, transamerica_pages, transamerica_sources
+from bench.synthetic_pdf import write_pdf
+
+
+# name: (importer factory taking text_backend, synthetic pages)
+IMPORTERS = {
+    'fidelity': (lambda **kw: fidelity_pdf.Importer('Assets:Fidelity', **kw),
+                 lambda: fidelity_pages(holdings=40, dividends=120, trades=80, transfers=20)),
+    'transamerica': (lambda **kw: transamerica_pdf.Importer(transamerica_sources(3), **kw),
+                     lambda: transamerica_pages(3, 3)),
+    'chase': (lambda **kw: pdf_chase_bank.Importer('Liabilities:Chase', '3456', **kw),
+              lambda: chase_pages(6)),
+}
+
+
+def run(factory, filepath, backend):
+    """Return the (identified, entries) of a cold run, and its duration."""
+    pdftext.setup_cache(None)
+    importer = factory(text_backend=backend)
+    start = time.perf_counter()
+    try:
+        result = importer.identify(filepath), importer.extract(filepath, [])
+    except Exception as exc:
+        result = f"{type(exc).__name__}: {exc}"
+    return result, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--statement', action='append', default=[], metavar='IMPORTER=PATH',
+                    help="benchmark on a real statement instead of a synthetic one")
+    args = ap.parse_args()
+    statements = dict(s.split('=', 1) for s in args.statement)
+
+    print(f"{'importer':<14} {'backend':<12} {'time':>10}  identical")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, (factory, pages) in IMPORTERS.items():
+            if statements and name not in statements:
+                continue
+            filepath = statements.get(name)
+            if filepath is None:
+                filepath = os.path.join(tmpdir, f'{name}.pdf')
+                write_pdf(filepath, pages())
+
+            declared = factory().text_backend
+            reference, _ = run(factory, filepath, declared)
+            backends = [b for b in pdftext.BACKENDS if pdftext.BACKENDS[b] is not pdftext.REPLAY]
+            for backend in sorted(backends, key=lambda b: b != declared):
+                best = float('inf')
+                for _ in range(args.repeat):
+                    result, elapsed = run(factory, filepath, backend)
+                    best = min(best, elapsed)
+                label = backend + ('*' if backend == declared else '')
+                same = 'yes' if result == reference else 'NO'
+                print(f"{name:<14} {label:<12} {best * 1e3:8.1f}ms  {same}")
+    print("(* declared backend)")
+
+
+if __name__ == '__main__':
+    main()
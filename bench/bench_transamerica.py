@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+"""Benchmark: page-targeted extraction of Transamerica statements.
+
+Writes a synthetic multi-plan statement (a summary page, then for each plan
+a Source table page followed by fund detail pages) and times extract() with
+layout extraction of every page against the targeted extraction, from a
+cold page cache each time. Both must produce the same entries.
+
+    python -m bench.bench_transamerica [--plans N] [--detail-pages N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from beancount_utils import pdftext
+from beancount_utils.importers import transamerica_pdf
+
+from bench.statements import transamerica_pages, transamerica_sources
+from bench.synthetic_pdf import write_pdf
+
+
+def run(importer, filepath, targeted):
+    pdftext.setup_cache(None)
+    if targeted:
+        return importer.extract(filepath, [])
+    saved = transamerica_pdf.find_table_pages
+    # Without the quick pass the importer extracts every page.
+    transamerica_pdf.find_table_pages = lambda *args: list(range(1 << 16))
+    try:
+        return importer.extract(filepath, [])
+    finally:
+        transamerica_pdf.find_table_pages = saved
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--plans', type=int, default=3)
+    ap.add_argument('--detail-pages', type=int, default=6)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    pages = transamerica_pages(args.plans, args.detail_pages)
+    importer = transamerica_pdf.Importer(transamerica_sources(args.plans))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = os.path.join(tmpdir, 'statement.pdf')
+        write_pdf(filepath, pages)
+
+        results = {}
+        for name, targeted in (('all pages', False), ('targeted', True)):
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results[name] = run(importer, filepath, targeted)
+                best = min(best, time.perf_counter() - start)
+            print(f"{name:<10} {best * 1e3:8.1f} ms  ({len(pages)} pages, {args.plans} plans)")
+        assert results['all pages'] == results['targeted']
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Synthetic statement page text for the PDF importer benchmarks.
+
+Each generator returns a list of pages, each a list of text lines, laid out
+the way the importer parsers expect. Write them out with
+bench.synthetic_pdf.write_pdf(), or join the lines for page text.
+"""
+
+import random
+
+FIDELITY_NAMES = [
+    "VANGUARD TOTAL STOCK MARKET ETF", "ISHARES CORE S&P 500 ETF", "SCHWAB US DIVIDEND EQUITY ETF",
+    "FIDELITY 500 INDEX FUND", "ACME WIDGETS INC COM", "GLOBEX CORP COM",
+]
+
+TRANSAMERICA_SOURCES = ["Employee Pre-Tax", "Employer Match", "Roth Deferral", "Rollover"]
+
+
+def fidelity_pages(holdings=50, dividends=100, trades=60, transfers=20, per_page=40, seed=0):
+    """A Fidelity statement with the given number of rows per section."""
+    rng = random.Random(seed)
+    lines = [
+        "Fidelity Investments", "INVESTMENT REPORT", "January 1, 2024 - March 31, 2024", "Account Summary",
+        "Holdings", "Core Account",
+        "FIDELITY GOVERNMENT MONEY MARKET (SPAXX) $1,000.00 1,234.560 $1.0000 $1,234.56 - 4.9%",
+        "Total Core Account $1,234.56", "Exchange Traded Products",
+    ]
+    names = []
+    for h in range(holdings):
+        name = f"{rng.choice(FIDELITY_NAMES)} {h:04d}"
+        ticker = "".join(chr(65 + (h // 26 ** k) % 26) for k in range(4)) + chr(65 + h % 7)
+        names.append(name)
+        qty = f"{rng.randrange(1, 9999):,}.{rng.randrange(1000):03d}"
+        if h % 3 == 0:
+            # Ticker wrapped onto the next line.
+            lines.append(f"{name} $1,000.00 {qty} $12.3400 $2,345.67 $100.00 -")
+            lines.append(f"CLASS A ({ticker})")
+        else:
+            lines.append(f"{name} ({ticker}) $1,000.00 {qty} $12.3400 $2,345.67 $100.00 -")
+        if h % 17 == 16:
+            lines.append("Stocks")
+    lines += [
+        "Total Holdings $99,999.99", "Activity", "Securities Bought & Sold",
+        "Date Security Name Symbol/CUSIP Description Quantity Price Cost Basis Amount",
+    ]
+    for t in range(trades):
+        name = rng.choice(names)
+        side = rng.choice(["Bought", "Sold"])
+        cost, sign = ("-", "-") if side == "Bought" else ("$1,111.11", "")
+        lines.append(
+            f"{1 + t % 3:02d}/{1 + t % 28:02d} {name} 92290876{t % 10} You {side} "
+            f"{rng.randrange(1, 99)}.000 ${rng.randrange(1, 500)}.1234 {cost} "
+            f"{sign}${rng.randrange(1, 9999):,}.{rng.randrange(100):02d}")
+    lines += [
+        "Total Securities Bought $1.00", "Dividends, Interest & Other Income",
+        "Date Security Name Symbol/CUSIP Description Quantity Price Amount",
+    ]
+    for d in range(dividends):
+        words = rng.choice(names).split()
+        if d % 5 == 0:
+            # Name wrapped onto the next line.
+            lines.append(f"{1 + d % 3:02d}/{1 + d % 28:02d} {' '.join(words[:-2])} 46428742{d % 10} "
+                         f"Dividend Received - - ${d}.{d % 100:02d}")
+            lines.append(" ".join(words[-2:]))
+        else:
+            lines.append(f"{1 + d % 3:02d}/{1 + d % 28:02d} {' '.join(words)} 46428742{d % 10} "
+                         f"Dividend Received - - ${d}.{d % 100:02d}")
+    lines += ["Total Dividends, Interest & Other Income $1.00", "Deposits", "Date Reference Description Amount"]
+    for x in range(transfers):
+        lines.append(f"{1 + x % 3:02d}/{1 + x % 28:02d} Electronic Funds Transfer Received REF{x} ${x * 10 + 1}.00")
+    lines += ["Total Deposits $1.00", "Withdrawals", "Date Reference Description Amount"]
+    for x in range(transfers):
+        lines.append(f"{1 + x % 3:02d}/{1 + x % 28:02d} Transfer To Bank REF{x} -${x * 5 + 1}.00")
+    lines += ["Total Withdrawals -$1.00", "Core Fund Activity", "Additional Information"]
+    return [lines[i:i + per_page] for i in range(0, len(lines), per_page)]
+
+
+def transamerica_pages(plans=3, detail_pages=6):
+    """A summary page, then per plan a Source table and fund detail pages."""
+    pages = [[
+        "Transamerica Retirement Solutions",
+        "Quarterly Retirement Statement",
+        "January 1, 2024 - March 31, 2024",
+        "Account Summary",
+    ]]
+    for p in range(plans):
+        table = [
+            f"Plan {p + 1} Retirement Savings Plan",
+            "Source Beginning Balance Money In Money Out Transfers Credits/Fees Gain/Loss Ending Balance Vested %",
+        ]
+        for s, source in enumerate(TRANSAMERICA_SOURCES):
+            table.append(
+                f"Plan {p + 1} {source} $1{p}{s},000.00 $1,500.00 $0.00 $0.00 -$1{s}.25 "
+                f"$2,{p}{s}4.50 $1{p}{s},000.00 100.0%")
+        table.append("Totals $1.00 $1.00 $0.00 $0.00 -$1.00 $1.00 $1.00")
+        pages.append(table)
+        for d in range(detail_pages):
+            pages.append([f"Plan {p + 1} Investment Detail ({d + 1})"] + [
+                f"01/{1 + (r % 28):02d}/2024 Fund {r % 17} Contribution 12.3456 units at $45.6789 $563.95"
+                for r in range(55)
+            ])
+    return pages
+
+
+def transamerica_sources(plans=3):
+    """Importer sources for transamerica_pages()."""
+    return {f"Plan {p + 1} {s}": f"Assets:Retirement:Plan{p + 1}:{s.replace(' ', '').replace('-', '')}"
+            for p in range(plans) for s in TRANSAMERICA_SOURCES}
+
+
+def chase_pages(detail_pages=4, last4="3456"):
+    """A Chase card statement: account summary, then transaction pages."""
+    pages = [[
+        "Chase Freedom",
+        f"Account Number:  1234 5678 9012 {last4}",
+        "Opening/Closing Date 02/27/24 - 03/26/24",
+        "Previous Balance: $1000.00",
+        "New Balance: $1234.56",
+    ]]
+    for d in range(detail_pages):
+        pages.append([f"{(r % 28) + 1:02d}/{r % 12 + 1:02d} MERCHANT {d}-{r} SEATTLE WA {r}.99" for r in range(55)])
+    return pages
@@ -0,0 +1,57 @@
+"""Write minimal text-only PDFs for benchmarks."""
+import zlib
+
+
+def _escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path, pages, info=None, font_size=9, compress=True):
+    """Write a PDF with one page per list of text lines (Helvetica)."""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    pages_id = len(objects) + 1
+    objects.append(None)  # placeholder for /Pages
+    kids = []
+    for lines in pages:
+        ops = ['BT', f'/F1 {font_size} Tf', f'{font_size + 3} TL', '36 756 Td']
+        for line in lines:
+            ops.append(f'({_escape(line)}) Tj T*')
+        ops.append('ET')
+        stream = '\n'.join(ops).encode('cp1252')
+        if compress:
+            stream = zlib.compress(stream)
+            content = add(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        else:
+            content = add(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        kids.append(add(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] '
+                        b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+                        % (pages_id, font, content)))
+    objects[pages_id - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % k for k in kids), len(kids))
+    catalog = add(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+    info_id = None
+    if info:
+        info_id = add(b'<< ' + b' '.join(
+            b'/%s (%s)' % (k.encode(), _escape(v).encode('cp1252')) for k, v in info.items()) + b' >>')
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % i + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for off in offsets:
+        out += b'%010d 00000 n \n' % off
+    trailer = b'<< /Size %d /Root %d 0 R' % (len(objects) + 1, catalog)
+    if info_id:
+        trailer += b' /Info %d 0 R' % info_id
+    out += b'trailer\n' + trailer + b' >>\nstartxref\n%d\n%%%%EOF\n' % xref
+    with open(path, 'wb') as f:
+        f.write(out)
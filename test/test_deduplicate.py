@@ -0,0 +1,38 @@
+import datetime
+import unittest
+from decimal import Decimal
+
+from beancount.core.data import Amount, Posting, Transaction, new_metadata
+from beangulp.extract import DUPLICATE
+
+from beancount_utils import deduplicate
+
+
+def transaction(*postings):
+    """A transaction with a (account, import id) posting per pair."""
+    return Transaction(new_metadata('test', 0), datetime.date(2024, 1, 1), '*', None, '', frozenset(), frozenset(), [
+        Posting(account, Amount(Decimal('1'), 'USD'), None, None, None, {'import_id': import_id})
+        for account, import_id in postings])
+
+
+class TestImportIds(unittest.TestCase):
+    def test_account_boundary(self):
+        spot = transaction(('Assets:Kraken:USD', 'A'))
+        futures = transaction(('Assets:KrakenFutures:USD', 'B'))
+        top = transaction(('Assets:Kraken', 'C'))
+        index, others = deduplicate.index_import_ids([spot, futures, top], 'Assets:Kraken')
+        self.assertEqual(index, {'A': spot, 'C': top})
+        self.assertEqual(others, [futures])
+
+        # A known id on a sibling account doesn't make a duplicate.
+        incoming = [transaction(('Assets:Kraken:USD', 'A')),
+                    transaction(('Assets:KrakenFutures:USD', 'A')),
+                    transaction(('Assets:Kraken:USD', 'A'), ('Assets:KrakenFutures:USD', 'D'))]
+        remaining = deduplicate.mark_duplicate_ids(incoming, index, 'Assets:Kraken')
+        self.assertIs(incoming[0].meta[DUPLICATE], spot)
+        self.assertIs(incoming[2].meta[DUPLICATE], spot)
+        self.assertEqual(remaining, [incoming[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
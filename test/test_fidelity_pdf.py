@@ -0,0 +1,118 @@
+import datetime
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from beancount_utils import pdftext
+from beancount_utils.importers import fidelity_pdf
+
+
+PAGES = [
+    "INVESTMENT REPORT\n"
+    "December 1, 2023 - January 31, 2024\n"
+    "Holdings\n"
+    "Core Account\n"
+    "FIDELITY GOVERNMENT MONEY MARKET (SPAXX) $900.00 1,000.000 $1.0000 $1,000.00 - 4.9%\n"
+    "Total Core Account $1,000.00\n"
+    "Exchange Traded Products\n"
+    "VANGUARD TOTAL STOCK $1,000.00 10.000 $250.0000 $2,500.00 $20.00 -\n"
+    "MARKET ETF (VTI)\n"
+    "Total Holdings $3,500.00",
+    "Activity\n"
+    "Securities Bought & Sold\n"
+    "12/15 VANGUARD TOTAL STOCK MARKET ETF 922908769 You Bought 2.000 $240.0000 - -$480.00\n"
+    "Total Securities Bought $480.00\n"
+    "Dividends, Interest & Other Income\n"
+    "01/02 VANGUARD TOTAL STOCK 922908769 Dividend Received - - $12.34\n"
+    "MARKET ETF\n"
+    "Total Dividends, Interest & Other Income $12.34\n"
+    "Deposits\n"
+    "Date Reference Description Amount\n"
+    "12/01 Electronic Funds Transfer Received $500.00\n"
+    "Total Deposits $500.00\n"
+    "Withdrawals\n"
+    "01/20 Transfer To Bank $25.00\n"
+    "Total Withdrawals -$25.00",
+]
+
+
+def setUpModule():
+    # Keep extracted text in memory, whatever the environment says.
+    pdftext.setup_cache(None)
+
+
+class TestParseStatement(unittest.TestCase):
+    def test_sections(self):
+        statement = fidelity_pdf.parse_statement(PAGES)
+        self.assertEqual((statement.start, statement.end),
+                         (datetime.date(2023, 12, 1), datetime.date(2024, 1, 31)))
+
+        self.assertEqual(list(statement.holdings), ['SPAXX', 'VTI'])
+        self.assertTrue(statement.holdings['SPAXX']['is_core'])
+        self.assertEqual(statement.holdings['VTI']['name'], 'VANGUARD TOTAL STOCK MARKET ETF')
+        self.assertEqual(statement.holdings['VTI']['quantity'], Decimal('10.000'))
+
+        self.assertEqual(statement.trades, [{
+            'date': datetime.date(2023, 12, 15),
+            'name': 'VANGUARD TOTAL STOCK MARKET ETF',
+            'side': 'Bought',
+            'quantity': Decimal('2.000'),
+            'price': Decimal('240.0000'),
+            'amount': Decimal('480.00'),
+        }])
+        self.assertEqual(statement.dividends, [{
+            'date': datetime.date(2024, 1, 2),
+            'name': 'VANGUARD TOTAL STOCK MARKET ETF',
+            'amount': Decimal('12.34'),
+        }])
+        self.assertEqual([(t['date'], t['amount']) for t in statement.transfers], [
+            (datetime.date(2023, 12, 1), Decimal('500.00')),
+            (datetime.date(2024, 1, 20), Decimal('-25.00')),
+        ])
+
+    def test_missing_period(self):
+        with self.assertRaises(ValueError):
+            fidelity_pdf.parse_statement(PAGES[1:])
+
+
+class TestReplay(unittest.TestCase):
+    def test_extract_fixture(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fixture = os.path.join(tmpdir, 'statement.pdf.pages.txt')
+            pdftext.write_fixture(fixture, PAGES)
+            importer = fidelity_pdf.Importer('Assets:Fidelity', text_backend='replay')
+            self.assertTrue(importer.identify(fixture))
+            # Fixtures are only read when asked for.
+            self.assertFalse(fidelity_pdf.Importer('Assets:Fidelity').identify(fixture))
+            entries = importer.extract(fixture, [])
+        self.assertEqual(sorted(e.narration if hasattr(e, 'narration') else e.account for e in entries), [
+            'Assets:Fidelity:USD',
+            'Assets:Fidelity:VTI',
+            'Buy VTI',
+            'Deposit - Electronic Funds Transfer Received',
+            'Dividend - VTI',
+            'Withdrawal - Transfer To Bank',
+        ])
+
+
+class TestTickerIndex(unittest.TestCase):
+    def test_resolve(self):
+        index = fidelity_pdf.TickerIndex({
+            'VANGUARD TOTAL STOCK MARKET ETF': 'VTI',
+            'VANGUARD TOTAL STOCK': 'VTSAX',
+            'ISHARES CORE S&P 500 ETF': 'IVV',
+            'ISHARES CORE': 'ICORE',
+        })
+        self.assertEqual(index.resolve('VANGUARD TOTAL STOCK'), 'VTSAX')
+        # Prefixes either way resolve to the earliest holding.
+        self.assertEqual(index.resolve('VANGUARD TOTAL STOCK MARKET'), 'VTI')
+        self.assertEqual(index.resolve('VANGUARD TOTAL STOCK MARKET ETF CL A'), 'VTI')
+        self.assertEqual(index.resolve('ISHARES CORE S&P 500 ETF X'), 'IVV')
+        self.assertEqual(index.resolve('ISHARES CORE MSCI'), 'ICORE')
+        self.assertEqual(index.resolve('ISHARES'), 'IVV')
+        self.assertIsNone(index.resolve('SCHWAB US DIVIDEND'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from beancount_utils import jsonload
+
+
+DOCUMENT = {
+    'result': {'XETH': '1.2500', 'ZUSD': '-0.0001'},
+    'time': 1700000000.1234,
+    'count': 3,
+    'flags': [True, False, None],
+    'text': 'café "quoted"',
+}
+
+
+class TestLoad(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, text):
+        filepath = os.path.join(self.tmpdir.name, 'export.json')
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return filepath
+
+    def test_backends(self):
+        filepath = self.write(json.dumps(DOCUMENT, ensure_ascii=False))
+        self.assertIn('json', jsonload.available())
+        for backend in jsonload.available():
+            with self.subTest(backend=backend):
+                self.assertEqual(jsonload.load(filepath, backend), DOCUMENT)
+        self.assertEqual(jsonload.load(filepath), DOCUMENT)
+
+    def test_fallback(self):
+        # Accepted by the json module, rejected by orjson.
+        filepath = self.write('{"text": "\\ud800"}')
+        for backend in jsonload.available():
+            with self.subTest(backend=backend):
+                self.assertEqual(jsonload.load(filepath, backend), {'text': '\ud800'})
+
+    def test_invalid(self):
+        filepath = self.write('{"result": ')
+        for backend in jsonload.available():
+            with self.subTest(backend=backend), self.assertRaises(ValueError):
+                jsonload.load(filepath, backend)
+
+
+class TestToDecimal(unittest.TestCase):
+    def test_amounts(self):
+        self.assertEqual(str(jsonload.to_decimal('0.0100')), '0.0100')
+        self.assertEqual(str(jsonload.to_decimal(12)), '12')
+        self.assertEqual(str(jsonload.to_decimal(0.1)), '0.1')
+        self.assertEqual(str(jsonload.to_decimal(-1234.56)), '-1234.56')
+        self.assertEqual(jsonload.to_decimal(Decimal('1.5')), Decimal('1.5'))
+        for value in (None, True, [1]):
+            with self.assertRaises(TypeError):
+                jsonload.to_decimal(value)
+
+
+if __name__ == '__main__':
+    unittest.main()
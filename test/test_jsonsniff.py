@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from beancount_utils import jsonsniff
+from beancount_utils.importers import kraken_balance_json, kraken_ledger_json, simplefin, singlefin
+
+
+LEDGER = {
+    'error': [],
+    'result': {
+        'ledger': {
+            'L1': {'refid': 'R1', 'time': 1700000000.5, 'type': 'staking', 'asset': 'XETH',
+                   'amount': '0.0100', 'fee': '0.0000', 'balance': '1.0000'},
+        },
+        'count': 1,
+    },
+}
+
+BALANCE = {'error': [], 'result': {'XXBT': '0.5000000000', 'XETH': '1.25', 'DOT.S': '10'}}
+
+SIMPLEFIN = {
+    'errors': ['Escaped \\"quotes\\" and {brackets} [inside] strings'],
+    'accounts': [
+        {'org': {'name': 'Bank', 'id': 'nested'}, 'id': 'ACT-1', 'name': 'Checking',
+         'transactions': [{'id': 'T1', 'amount': '-1.00', 'description': 'café ]}'}]},
+        {'id': 'ACT-2', 'name': 'Savings', 'balance': 12.5e3, 'transactions': []},
+    ],
+}
+
+
+class TestSniff(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        jsonsniff.sniff.cache_clear()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        filepath = os.path.join(self.tmpdir.name, name)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return filepath
+
+    def test_shapes(self):
+        for chunk_size in (1, 3, 7, jsonsniff.CHUNK_SIZE):
+            with self.subTest(chunk_size=chunk_size), mock.patch.object(jsonsniff, 'CHUNK_SIZE', chunk_size):
+                jsonsniff.sniff.cache_clear()
+                ledger = jsonsniff.sniff(self.write('ledger.json', json.dumps(LEDGER, indent=2)))
+                self.assertEqual(ledger, jsonsniff.Shape(True, {}, ()))
+
+                balance = jsonsniff.sniff(self.write('balance.json', json.dumps(BALANCE)))
+                self.assertEqual(balance, jsonsniff.Shape(False, BALANCE['result'], ()))
+
+                accounts = jsonsniff.sniff(self.write('simplefin.json', json.dumps(SIMPLEFIN, ensure_ascii=False)))
+                self.assertEqual(accounts, jsonsniff.Shape(False, {}, ('ACT-1', 'ACT-2')))
+
+    def test_stops_at_ledger(self):
+        # Whatever follows the ledger key is never read.
+        text = json.dumps(LEDGER)
+        text = text[:text.index('"ledger"') + 10] + '{"L1": ' + 'x' * 100
+        self.assertTrue(jsonsniff.sniff(self.write('ledger.json', text)).ledger)
+
+    def test_unreadable(self):
+        self.assertEqual(jsonsniff.sniff(self.write('list.json', '[1, 2]')), jsonsniff.EMPTY)
+        self.assertEqual(jsonsniff.sniff(self.write('broken.json', '{"accounts": [{"id": ')), jsonsniff.EMPTY)
+        self.assertEqual(jsonsniff.sniff(self.write('invalid.json', '{"result": nope}')), jsonsniff.EMPTY)
+
+    def test_identify(self):
+        ledger = self.write('ledger.json', json.dumps(LEDGER))
+        balance = self.write('balance.json', json.dumps(BALANCE))
+        accounts = self.write('simplefin.json', json.dumps(SIMPLEFIN))
+        importers = {
+            'ledger': kraken_ledger_json.Importer('Assets:Kraken'),
+            'balance': kraken_balance_json.Importer('Assets:Kraken'),
+            'simplefin': simplefin.Importer({'ACT-1': 'Assets:Checking'}),
+            'singlefin': singlefin.Importer('Assets:Savings', 'ACT-2'),
+        }
+        expected = {
+            ledger: {'ledger'},
+            balance: {'balance'},
+            accounts: {'simplefin', 'singlefin'},
+        }
+        with mock.patch.object(jsonsniff, '_shape', wraps=jsonsniff._shape) as shape:
+            for filepath, names in expected.items():
+                identified = {name for name, importer in importers.items() if importer.identify(filepath)}
+                self.assertEqual(identified, names, filepath)
+            # Read once per file, whatever the number of importers.
+            self.assertEqual(shape.call_count, 3)
+        self.assertFalse(singlefin.Importer('Assets:Other', 'ACT-3').identify(accounts))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from beancount import loader
+
+from beancount_utils.importers import kraken_balance_json
+
+
+class TestChangedBalances(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, 'balance.json')
+        with open(self.filepath, 'w') as f:
+            json.dump({'error': [], 'result': {
+                'XXBT': '0.5000000000', 'XETH': '1.0', 'XETH.S': '0.25', 'DOT.S': '10.0', 'ZUSD': '100.00',
+            }}, f)
+        self.existing, errors, _ = loader.load_string(
+            '2020-01-01 open Assets:Kraken:BTC\n'
+            '2020-01-01 open Assets:Kraken:ETH\n'
+            '2020-01-01 open Assets:Kraken:USD\n'
+            '2024-01-01 balance Assets:Kraken:BTC  0.4 BTC\n'
+            '2024-02-01 balance Assets:Kraken:BTC  0.5 BTC\n'
+            '2024-01-01 balance Assets:Kraken:ETH  1.25 ETH\n'
+            '2024-02-01 balance Assets:Kraken:ETH  1.00 ETH\n'
+            '2024-02-01 balance Assets:Kraken:USD  100 USD\n')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_changed_only(self):
+        importer = kraken_balance_json.Importer('Assets:Kraken')
+        with self.assertLogs(kraken_balance_json.logger, 'INFO') as logs:
+            entries = importer.extract(self.filepath, self.existing)
+        # BTC and USD are as last asserted; ETH changed and DOT is new.
+        self.assertEqual([(entry.account, entry.amount.number) for entry in entries],
+                         [('Assets:Kraken:DOT', Decimal('10.0')), ('Assets:Kraken:ETH', Decimal('1.25'))])
+        self.assertIn('2 balances changed (DOT ETH), 2 unchanged (BTC USD)', logs.output[0])
+
+    def test_all(self):
+        importer = kraken_balance_json.Importer('Assets:Kraken', only_changed=False)
+        entries = importer.extract(self.filepath, self.existing)
+        self.assertEqual([entry.amount.currency for entry in entries], ['BTC', 'DOT', 'ETH', 'USD'])
+
+
+if __name__ == '__main__':
+    unittest.main()
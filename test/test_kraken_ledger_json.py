@@ -0,0 +1,319 @@
+import datetime
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from decimal import Decimal
+
+from beancount import loader
+from beancount.core import data
+from beangulp.extract import DUPLICATE
+from beanprice import source as beanprice_source
+from dateutil import tz
+
+from beancount_utils import prices
+from beancount_utils.importers import kraken_ledger_json
+
+
+class FakeSource(beanprice_source.Source):
+    """A price source answering 100 + day of month, counting its calls."""
+
+    calls = []
+    lock = threading.Lock()
+
+    def get_historical_price(self, ticker, time):
+        with self.lock:
+            self.calls.append((ticker, time.date()))
+        return beanprice_source.SourcePrice(Decimal(100 + time.day), time, 'USD')
+
+
+def install_fake_source():
+    module = types.ModuleType('fake_kraken_price_source')
+    module.Source = FakeSource
+    sys.modules[module.__name__] = module
+    FakeSource.calls = []
+
+
+def timestamp(day, hour=12, minute=0):
+    return datetime.datetime(2024, 1, day, hour, minute, tzinfo=tz.tzlocal()).timestamp()
+
+
+def make_ledger():
+    ledger = {}
+    for day in range(1, 6):
+        for hour in (1, 13):
+            # Two rewards a day for each asset.
+            for minute, asset in enumerate(('XETH', 'DOT.S')):
+                ledger[f'L{len(ledger)}'] = {
+                    'refid': f'R{len(ledger)}', 'time': timestamp(day, hour, minute), 'type': 'staking',
+                    'subtype': '', 'aclass': 'currency', 'asset': asset,
+                    'amount': '0.0100', 'fee': '0.0000', 'balance': '1.0000',
+                }
+    return {'result': {'ledger': ledger, 'count': len(ledger)}}
+
+
+class TestStakingPrices(unittest.TestCase):
+    def setUp(self):
+        install_fake_source()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, 'ledger.json')
+        with open(self.filepath, 'w') as f:
+            json.dump(make_ledger(), f)
+        self.existing, errors, _ = loader.load_string(
+            '2020-01-01 commodity ETH\n'
+            '  price: "USD:fake_kraken_price_source/ETHUSD"\n'
+            '2020-01-01 commodity DOT\n'
+            '  price: "USD:fake_kraken_price_source/DOTUSD"\n')
+        self.assertFalse(errors)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_unique_fetches(self):
+        importer = kraken_ledger_json.Importer('Assets:Kraken', price_workers=4)
+        entries = importer.extract(self.filepath, self.existing)
+        txns = list(data.filter_txns(entries))
+
+        self.assertEqual(len(txns), 20)
+        # One fetch per asset and day, not per reward.
+        self.assertEqual(len(FakeSource.calls), 10)
+        self.assertEqual(len(set(FakeSource.calls)), 10)
+        for entry in txns:
+            cost = entry.postings[1].cost
+            self.assertEqual(cost.number_per, Decimal(100 + entry.date.day))
+            self.assertEqual(cost.currency, 'USD')
+
+    def test_rate_limit(self):
+        importer = kraken_ledger_json.Importer(
+            'Assets:Kraken', price_workers=4, price_rate_limits={'fake_kraken_price_source': 50})
+        start = time.monotonic()
+        importer.extract(self.filepath, self.existing)
+        # Ten calls spaced 1/50s apart.
+        self.assertGreaterEqual(time.monotonic() - start, 9 / 50)
+
+    def test_injected_fetch(self):
+        jobs = []
+
+        def fetch(dprice):
+            jobs.append(dprice)
+            return None
+
+        importer = kraken_ledger_json.Importer('Assets:Kraken', fetch_price=fetch)
+        entries = importer.extract(self.filepath, self.existing)
+        self.assertEqual(len(jobs), 10)
+        self.assertEqual(FakeSource.calls, [])
+        self.assertTrue(all(entry.postings[1].cost is None for entry in entries))
+
+    def test_fetched_prices_extracted(self):
+        importer = kraken_ledger_json.Importer('Assets:Kraken')
+        entries = importer.extract(self.filepath, self.existing)
+        prices = [entry for entry in entries if isinstance(entry, data.Price)]
+        self.assertEqual(len(prices), 10)
+        self.assertEqual({(p.currency, p.amount.currency) for p in prices}, {('ETH', 'USD'), ('DOT', 'USD')})
+        self.assertTrue(all(p.meta['filename'] == self.filepath for p in prices))
+
+        # The next import finds them in the ledger.
+        FakeSource.calls = []
+        entries = importer.extract(self.filepath, self.existing + prices)
+        self.assertEqual(FakeSource.calls, [])
+        self.assertFalse([entry for entry in entries if isinstance(entry, data.Price)])
+        for entry in data.filter_txns(entries):
+            self.assertEqual(entry.postings[1].cost.number_per, Decimal(100 + entry.date.day))
+
+    def test_fetched_price_date(self):
+        # A source answering with the previous day's close.
+        def fetch(dprice):
+            return data.Price({}, dprice.date - datetime.timedelta(days=1), dprice.base,
+                              data.Amount(Decimal(100 + dprice.date.day), dprice.quote))
+
+        importer = kraken_ledger_json.Importer('Assets:Kraken', fetch_price=fetch)
+        entries = importer.extract(self.filepath, self.existing)
+        prices = [entry for entry in entries if isinstance(entry, data.Price)]
+        self.assertEqual(sorted({p.date.day for p in prices}), [1, 2, 3, 4, 5])
+
+        jobs = []
+        importer = kraken_ledger_json.Importer('Assets:Kraken', fetch_price=jobs.append)
+        importer.extract(self.filepath, self.existing + prices)
+        self.assertEqual(jobs, [])
+
+    def test_declared_quote(self):
+        # Prices are in the quote the source is declared with.
+        existing, errors, _ = loader.load_string(
+            '2020-01-01 commodity ETH\n'
+            '  price: "EUR:fake_kraken_price_source/ETHEUR"\n'
+            '2020-01-01 commodity DOT\n'
+            '  price: "USD:fake_kraken_price_source/DOTUSD"\n')
+        self.assertFalse(errors)
+        importer = kraken_ledger_json.Importer('Assets:Kraken')
+        entries = importer.extract(self.filepath, existing)
+        costs = {(entry.postings[1].units.currency, entry.postings[1].cost.currency)
+                 for entry in data.filter_txns(entries)}
+        self.assertEqual(costs, {('ETH', 'EUR'), ('DOT', 'USD')})
+        prices = {(p.currency, p.amount.currency) for p in entries if isinstance(p, data.Price)}
+        self.assertEqual(prices, {('ETH', 'EUR'), ('DOT', 'USD')})
+
+    def test_price_tolerance(self):
+        existing, _, _ = loader.load_string(
+            '2024-01-02 price ETH 2000 USD\n'
+            '2024-01-04 price ETH 4000 USD\n', dedent=True)
+        importer = kraken_ledger_json.Importer('Assets:Kraken', price_tolerance=1)
+        entries = importer.extract(self.filepath, self.existing + existing)
+        costs = {entry.date.day: entry.postings[1].cost.number_per
+                 for entry in data.filter_txns(entries) if entry.postings[1].units.currency == 'ETH'}
+        # Days 1 to 5 are all within a day of a Price, the earlier one on a tie.
+        self.assertEqual(costs, {1: 2000, 2: 2000, 3: 2000, 4: 4000, 5: 4000})
+        self.assertEqual({asset for asset, _ in FakeSource.calls}, {'DOTUSD'})
+
+
+class TestMergeFiles(unittest.TestCase):
+    def setUp(self):
+        install_fake_source()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ledger = make_ledger()['result']['ledger']
+        # Overlapping exports, newest rows first as Kraken writes them.
+        ids = sorted(self.ledger, key=lambda tid: self.ledger[tid]['time'], reverse=True)
+        for name, part in (('a.json', ids[:14]), ('b.json', ids[8:]), ('c.json', ids[4:10])):
+            with open(os.path.join(self.tmpdir.name, name), 'w') as f:
+                json.dump({'result': {'ledger': {tid: self.ledger[tid] for tid in part}}}, f)
+        with open(os.path.join(self.tmpdir.name, 'other.json'), 'w') as f:
+            json.dump({'accounts': []}, f)
+        self.existing, _, _ = loader.load_string(
+            '2020-01-01 commodity ETH\n'
+            '  price: "USD:fake_kraken_price_source/ETHUSD"\n')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_directory(self):
+        importer = kraken_ledger_json.Importer('Assets:Kraken')
+        entries = importer.extract_files([self.tmpdir.name], self.existing)
+        txns = list(data.filter_txns(entries))
+        ids = [posting.meta['import_id'] for entry in txns for posting in entry.postings if posting.meta]
+        self.assertEqual(sorted(ids), sorted(self.ledger))
+        self.assertEqual([entry.date for entry in txns], sorted(entry.date for entry in txns))
+        # Each price once, for the five days of ETH rewards.
+        self.assertEqual(len(FakeSource.calls), 5)
+        self.assertEqual(len([entry for entry in entries if isinstance(entry, data.Price)]), 5)
+
+        # The same entries as from a single export of all the rows.
+        whole = os.path.join(self.tmpdir.name, 'whole.json')
+        with open(whole, 'w') as f:
+            json.dump({'result': {'ledger': self.ledger}}, f)
+        single = importer.extract(whole, self.existing)
+        key = lambda entry: (entry.date, entry.postings[-1].meta['import_id']) if hasattr(entry, 'postings') else (entry.date, '')
+        strip = lambda entries: [entry._replace(meta=None) for entry in sorted(entries, key=key)]
+        self.assertEqual(strip(entries), strip(single))
+
+    def test_merge_ledgers(self):
+        def records(source, *rows):
+            return [kraken_ledger_json.LedgerRecord(tid, 'R', time, 'trade', '', 'ETH', 1, 0, 1, source)
+                    for tid, time in rows]
+        merged = kraken_ledger_json.merge_ledgers([
+            records('a', ('L3', 3), ('L1', 1)),
+            records('b', ('L2', 2), ('L1', 1), ('L4', 4)),
+        ])
+        # Time ordered, and L1 from the first export holding it.
+        self.assertEqual([(r.id, r.source) for r in merged], [('L1', 'a'), ('L2', 'b'), ('L3', 'a'), ('L4', 'b')])
+
+
+class TestDeduplicate(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # Identical rewards, many a day.
+        ledger = {
+            f'L{i:03d}': {'refid': f'R{i:03d}', 'time': timestamp(1 + i // 10, 1 + i % 10), 'type': 'staking',
+                          'subtype': '', 'asset': 'DOT.S', 'amount': '0.0100', 'fee': '0.0000', 'balance': '1'}
+            for i in range(40)
+        }
+        self.filepath = os.path.join(self.tmpdir.name, 'ledger.json')
+        with open(self.filepath, 'w') as f:
+            json.dump({'result': {'ledger': ledger}}, f)
+        self.importer = kraken_ledger_json.Importer('Assets:Kraken')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def extract(self, existing):
+        entries = self.importer.extract(self.filepath, existing)
+        self.importer.deduplicate(entries, existing)
+        return [entry for entry in entries if not entry.meta.get(DUPLICATE)]
+
+    def test_ids(self):
+        entries = self.importer.extract(self.filepath, [])
+        posting = entries[0].postings[1]
+        self.assertEqual((posting.meta['import_id'], posting.meta['refid']), ('L000', 'R000'))
+
+        # Only the rewards missing from the ledger are new, despite their
+        # twins on the same days.
+        existing = [entry for i, entry in enumerate(entries) if i % 3]
+        new = self.extract(existing)
+        self.assertEqual([entry.postings[1].meta['import_id'] for entry in new],
+                         [entry.postings[1].meta['import_id'] for i, entry in enumerate(entries) if not i % 3])
+        self.assertEqual(self.extract(entries), [])
+
+    def test_legacy(self):
+        # Entries imported before ids were recorded are matched the windowed way.
+        entries = self.importer.extract(self.filepath, [])
+        legacy = [entry._replace(postings=[p._replace(meta=None) for p in entry.postings]) for entry in entries]
+        self.assertEqual(self.extract(legacy[:10] + entries[10:]), [])
+
+
+class TestLedgerRecords(unittest.TestCase):
+    def test_parse_and_group(self):
+        ledger = {
+            'L1': {'refid': 'R1', 'time': 10.5, 'type': 'trade', 'subtype': '', 'asset': 'ZUSD',
+                   'amount': '-100.00', 'fee': '0.0000', 'balance': '900.00'},
+            'L2': {'refid': 'R1', 'time': 10.5, 'type': 'trade', 'subtype': '', 'asset': 'XETH',
+                   'amount': '0.0500', 'fee': '0.0000', 'balance': '0.0500'},
+            'L3': {'refid': 'R2', 'time': 10.5, 'type': 'staking', 'subtype': '', 'asset': 'DOT.S',
+                   'amount': '1.5', 'fee': '0.1', 'balance': '11.5'},
+        }
+        records = kraken_ledger_json.parse_ledger(ledger)
+        self.assertEqual([(r.id, r.asset, r.amount) for r in records],
+                         [('L1', 'USD', Decimal('-100.00')), ('L2', 'ETH', Decimal('0.0500')), ('L3', 'DOT', Decimal('1.5'))])
+        # The rows are left untouched.
+        self.assertEqual(ledger['L3']['asset'], 'DOT.S')
+
+        groups = kraken_ledger_json.group_ledgers(records)
+        self.assertEqual({key: [r.id for r in group] for key, group in groups.items()},
+                         {(10.5, 'trade'): ['L1', 'L2'], (10.5, 'staking'): ['L3']})
+
+        trade = groups[(10.5, 'trade')]
+        self.assertEqual(kraken_ledger_json.extract_narration(trade, 'USD'), 'Buy ETH')
+        self.assertFalse(kraken_ledger_json.is_sale(trade, 'USD'))
+        cost = kraken_ledger_json.extract_cost(trade[1], trade, 'USD')
+        self.assertEqual((cost.number_total, cost.currency), (Decimal('100.00'), 'USD'))
+
+
+class TestPriceMemo(unittest.TestCase):
+    def test_lookup(self):
+        entries, _, _ = loader.load_string(
+            '2024-01-10 price ETH 10 USD\n'
+            '2024-01-20 price ETH 20 USD\n'
+            '2024-01-20 price ETH 21 EUR\n', dedent=True)
+        memo = prices.PriceMemo(entries, tolerance=3)
+        day = lambda d: datetime.date(2024, 1, d)
+        self.assertEqual(memo.lookup('ETH', 'USD', day(10)).amount.number, 10)
+        self.assertEqual(memo.lookup('ETH', 'USD', day(13)).amount.number, 10)
+        self.assertEqual(memo.lookup('ETH', 'USD', day(17)).amount.number, 20)
+        self.assertEqual(memo.lookup('ETH', 'EUR', day(22)).amount.number, 21)
+        self.assertIsNone(memo.lookup('ETH', 'USD', day(15)))
+        self.assertIsNone(memo.lookup('ETH', 'EUR', day(10)))
+        self.assertIsNone(prices.PriceMemo(entries).lookup('ETH', 'USD', day(11)))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_spacing(self):
+        limiter = prices.RateLimiter(100)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 4 / 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import datetime
+import random
+import unittest
+from decimal import Decimal
+
+from beancount.core import data
+from beancount.core.data import Amount, Balance, Price, Transaction, new_metadata
+
+from beancount_utils.merge import merge_entries
+
+
+def day(n):
+    return datetime.date(2024, 1, n)
+
+
+def transaction(date, narration, lineno=0):
+    return Transaction(new_metadata('test', lineno), date, '*', None, narration, frozenset(), frozenset(), [])
+
+
+def balance(date, number, lineno=0):
+    return Balance(new_metadata('test', lineno), date, 'Assets:Bank', Amount(Decimal(number), 'USD'), None, None)
+
+
+def price(date, number, lineno=0):
+    return Price(new_metadata('test', lineno), date, 'ETH', Amount(Decimal(number), 'USD'))
+
+
+class TestMergeEntries(unittest.TestCase):
+    def assertMergesLikeSort(self, *streams):
+        streams = [data.sorted(stream) for stream in streams]
+        expected = data.sorted([entry for stream in streams for entry in stream])
+        merged = merge_entries(*streams)
+        # Same entries in the same order, including between equal keys.
+        self.assertEqual([id(entry) for entry in merged], [id(entry) for entry in expected])
+
+    def test_ties(self):
+        # Balances sort before transactions of the same date; entries with
+        # equal keys keep the order of their streams.
+        transactions = [transaction(day(1), 'a'), transaction(day(2), 'b'), transaction(day(2), 'c')]
+        balances = [balance(day(2), '1'), balance(day(2), '2'), balance(day(3), '3')]
+        prices = [price(day(2), '10'), price(day(2), '11')]
+        self.assertMergesLikeSort(transactions, balances, prices)
+        self.assertMergesLikeSort(balances, transactions)
+        merged = merge_entries(transactions, balances)
+        self.assertEqual([type(entry).__name__ for entry in merged],
+                         ['Transaction', 'Balance', 'Balance', 'Transaction', 'Transaction', 'Balance'])
+
+    def test_random(self):
+        rng = random.Random(0)
+        makers = (transaction, balance, price)
+        streams = [
+            [rng.choice(makers)(day(rng.randint(1, 5)), str(i), rng.randint(0, 2)) for i in range(50)]
+            for _ in range(4)
+        ]
+        self.assertMergesLikeSort(*streams)
+
+    def test_empty(self):
+        self.assertEqual(merge_entries(), [])
+        self.assertEqual(merge_entries([], [transaction(day(1), 'a')])[0].narration, 'a')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from beancount_utils.importers import merrill_ofx
+
+
+SGML_HEADER = '''OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+SECURITY:NONE
+ENCODING:USASCII
+CHARSET:1252
+COMPRESSION:NONE
+OLDFILEUID:NONE
+NEWFILEUID:NONE
+
+'''
+
+XML_HEADER = '''<?xml version="1.0" encoding="US-ASCII"?>
+<?OFX OFXHEADER="200" VERSION="220" SECURITY="NONE" OLDFILEUID="NONE" NEWFILEUID="NONE"?>
+'''
+
+SGML_SIGNON = '''<OFX>
+<SIGNONMSGSRSV1>
+<SONRS>
+<STATUS>
+<CODE>0
+<SEVERITY>INFO
+</STATUS>
+<DTSERVER>20240102120000
+<LANGUAGE>ENG
+<FI>
+<ORG>Merrill
+{fi}</FI>
+</SONRS>
+</SIGNONMSGSRSV1>
+'''
+
+XML_SIGNON = '''<OFX>
+<SIGNONMSGSRSV1>
+<SONRS>
+<STATUS><CODE>0</CODE><SEVERITY>INFO</SEVERITY></STATUS>
+<DTSERVER>20240102120000</DTSERVER>
+<LANGUAGE>ENG</LANGUAGE>
+<FI><ORG>Merrill</ORG>{fi}</FI>
+</SONRS>
+</SIGNONMSGSRSV1>
+'''
+
+
+class TestSniffFid(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        merrill_ofx.parse_ofx.cache_clear()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, text, name='statement.ofx'):
+        filepath = os.path.join(self.tmpdir.name, name)
+        with open(filepath, 'w') as f:
+            f.write(text)
+        return filepath
+
+    def test_sgml(self):
+        filepath = self.write(SGML_HEADER + SGML_SIGNON.format(fi='<FID>5550\n') + '</OFX>\n')
+        self.assertEqual(merrill_ofx.sniff_fid(filepath), '5550')
+        self.assertEqual(merrill_ofx.parse_ofx(filepath).signon.fi.fid, '5550')
+
+    def test_xml(self):
+        filepath = self.write(XML_HEADER + XML_SIGNON.format(fi='<FID>5550</FID>') + '</OFX>\n')
+        self.assertEqual(merrill_ofx.sniff_fid(filepath), '5550')
+
+    def test_missing_fid(self):
+        # A <FID> past the SIGNON block isn't the institution's.
+        filepath = self.write(SGML_HEADER + SGML_SIGNON.format(fi='') + '<FID>1234\n</OFX>\n')
+        self.assertIsNone(merrill_ofx.sniff_fid(filepath))
+
+    def test_signon_past_limit(self):
+        filepath = self.write(SGML_HEADER + '<!-- ' + 'x' * merrill_ofx.SIGNON_LIMIT + ' -->\n<FID>1234\n')
+        self.assertIsNone(merrill_ofx.sniff_fid(filepath))
+
+    def test_identify_falls_back_to_parse(self):
+        filepath = self.write(SGML_HEADER + SGML_SIGNON.format(fi='<FID>5550\n') + '</OFX>\n')
+        importers = [merrill_ofx.Importer(f'Assets:Merrill:{i}', 'USD', '5550') for i in range(3)]
+        with mock.patch.object(merrill_ofx, 'sniff_fid', return_value=None), \
+                mock.patch.object(merrill_ofx, 'OFXTree', wraps=merrill_ofx.OFXTree) as tree:
+            self.assertTrue(all(importer.identify(filepath) for importer in importers))
+        # Parsed once for all the importers.
+        self.assertEqual(tree.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
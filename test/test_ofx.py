@@ -0,0 +1,56 @@
+import datetime
+import unittest
+from decimal import Decimal
+
+from beancount_utils.ofx import detect_encoding, find_statements, parse_ofx_date, parse_ofx_time, read_stmttrn
+
+
+class TestParseOfxTime(unittest.TestCase):
+    def test_date_only(self):
+        self.assertEqual(parse_ofx_time('20240131'), datetime.datetime(2024, 1, 31))
+
+    def test_date_time(self):
+        self.assertEqual(parse_ofx_time('20240131235958'), datetime.datetime(2024, 1, 31, 23, 59, 58))
+
+    def test_fraction_and_timezone_ignored(self):
+        self.assertEqual(parse_ofx_time('20240131120000.000[-5:EST]'), datetime.datetime(2024, 1, 31, 12, 0, 0))
+
+    def test_date_memoized_across_forms(self):
+        self.assertIs(parse_ofx_date('20240229'), parse_ofx_date('20240229120000.000[-5:EST]'))
+        self.assertEqual(parse_ofx_date('20240229'), datetime.date(2024, 2, 29))
+
+    def test_invalid(self):
+        for value in ('2024013', '2024O131', '20240230', '20240131 12000'):
+            with self.assertRaises(ValueError):
+                parse_ofx_time(value)
+
+
+SGML_HEADER = b"OFXHEADER:100\r\nDATA:OFXSGML\r\nVERSION:102\r\nENCODING:USASCII\r\nCHARSET:{}\r\n\r\n"
+
+
+class TestEncoding(unittest.TestCase):
+    def test_detect_encoding(self):
+        self.assertEqual(detect_encoding(SGML_HEADER.replace(b'{}', b'1252')), 'cp1252')
+        self.assertEqual(detect_encoding(SGML_HEADER.replace(b'{}', b'NONE')), 'utf-8')
+        self.assertEqual(detect_encoding(SGML_HEADER.replace(b'{}', b'ISO-8859-1')), 'latin-1')
+        self.assertEqual(detect_encoding(b'<?xml version="1.0" encoding="windows-1252"?>\n<OFX>'), 'cp1252')
+        self.assertEqual(detect_encoding(b'<OFX>'), 'utf-8')
+
+    def test_charset_1252_fields(self):
+        contents = SGML_HEADER.replace(b'{}', b'1252') + (
+            "<OFX><STMTRS><CURDEF>USD<BANKACCTFROM><ACCTID>42</BANKACCTFROM><BANKTRANLIST>"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240102<TRNAMT>-3.50<NAME>CAFÉ &amp; BAR</STMTTRN>"
+            "</BANKTRANLIST><LEDGERBAL><BALAMT>10.00<DTASOF>20240103</LEDGERBAL></STMTRS></OFX>"
+        ).encode('cp1252')
+        encoding = detect_encoding(contents)
+        [stmt] = find_statements(contents, encoding)
+        self.assertEqual((stmt.acctid, stmt.currency), ('42', 'USD'))
+        self.assertEqual(stmt.balance, (datetime.date(2024, 1, 3), Decimal('10.00')))
+        trn = read_stmttrn(contents, stmt.transactions[0], encoding)
+        self.assertEqual(trn.payee, 'CAFÉ & BAR')
+        self.assertEqual(trn.number, Decimal('-3.50'))
+        self.assertEqual(trn.date, datetime.date(2024, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from beancount.core import data
+
+from beancount_utils.importers import ofx_bank
+
+
+def make_ofx(count):
+    start = datetime.date(2024, 1, 1)
+    trns = []
+    for i in range(count):
+        # Several identical transactions per day to exercise the date index
+        date = start + datetime.timedelta(days=i // 4)
+        trns.append(
+            f"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{date:%Y%m%d}120000.000[-5:EST]"
+            f"<TRNAMT>-{i % 2 + 1}.00<FITID>{i}<NAME>COFFEE &amp; CO</STMTTRN>")
+    return (
+        "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\n\n"
+        "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>USD"
+        "<BANKACCTFROM><BANKID>1<ACCTID>123456789<ACCTTYPE>CHECKING</BANKACCTFROM>"
+        "<BANKTRANLIST><DTSTART>20240101<DTEND>20241231\n"
+        + "\n".join(trns) +
+        "\n</BANKTRANLIST><LEDGERBAL><BALAMT>100.00<DTASOF>20241231</LEDGERBAL>"
+        "</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+
+class TestExtractParallel(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.ofx')
+        with os.fdopen(fd, 'w') as f:
+            f.write(make_ofx(50))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_parallel_matches_serial(self):
+        args = (self.path, '123', 'Assets:Bank', '!', ofx_bank.BalanceType.DECLARED)
+        with ofx_bank.open_ofx(self.path) as contents:
+            serial, serial_ids = ofx_bank.extract(contents, *args)
+            parallel, parallel_ids = ofx_bank.extract_parallel(contents, *args, workers=2, chunk_size=7)
+
+        self.assertEqual(len(serial), 51)
+        self.assertEqual(serial_ids, parallel_ids)
+        self.assertEqual(len(serial_ids), 50)
+        self.assertEqual(serial, parallel)
+        self.assertIsInstance(parallel[-1], data.Balance)
+        self.assertEqual(serial[1].payee, 'COFFEE & CO')
+
+
+if __name__ == '__main__':
+    unittest.main()
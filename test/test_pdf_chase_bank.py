@@ -0,0 +1,50 @@
+import datetime
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from beancount_utils import pdftext
+from beancount_utils.importers import pdf_chase_bank
+
+
+PAGES = [
+    "CHASE FREEDOM\n"
+    "Opening/Closing Date 02/27/24 - 03/26/24\n"
+    "Account Number:  1234 5678 9012 3456\n"
+    "New Balance: $123.45\n",
+    "Transactions\n",
+]
+
+
+def setUpModule():
+    # Keep extracted text in memory, whatever the environment says.
+    pdftext.setup_cache(None)
+
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fixture = os.path.join(self.tmpdir.name, 'statement.pdf.pages.txt')
+        pdftext.write_fixture(self.fixture, PAGES)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_identify(self):
+        importer = pdf_chase_bank.Importer('Liabilities:Chase', '3456', text_backend='replay')
+        self.assertTrue(importer.identify(self.fixture))
+        other = pdf_chase_bank.Importer('Liabilities:Chase', '9999', text_backend='replay')
+        self.assertFalse(other.identify(self.fixture))
+        # Fixtures are only read when asked for.
+        self.assertFalse(pdf_chase_bank.Importer('Liabilities:Chase', '3456').identify(self.fixture))
+
+    def test_extract(self):
+        importer = pdf_chase_bank.Importer('Liabilities:Chase', '3456', text_backend='replay')
+        [balance] = importer.extract(self.fixture, [])
+        self.assertEqual(balance.date, datetime.date(2024, 3, 27))
+        self.assertEqual(balance.amount.number, Decimal('-123.45'))
+
+
+if __name__ == '__main__':
+    unittest.main()
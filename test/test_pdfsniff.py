@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+import zlib
+
+from beancount_utils import pdfsniff
+
+
+# Words containing each marker, but not as a word of its own.
+NOT_MARKERS = {
+    b'Chase': b'Chased', b'CHASE': b'PURCHASE',
+    b'Fidelity': b'HighFidelity', b'FIDELITY': b'INFIDELITY',
+    b'Transamerica': b'Transamericas', b'TRANSAMERICA': b'TRANSAMERICAN',
+    b'Wealthfront': b'Wealthfronts', b'WEALTHFRONT': b'WEALTHFRONTS',
+}
+
+
+def make_pdf(text, info=b'', packed=False, content=None):
+    """A one-page PDF showing text, optionally with the page in an object stream."""
+    if content is None:
+        content = b'BT /F1 9 Tf 36 756 Td [(' + text[:3] + b')-20(' + text[3:] + b')] TJ ET'
+    content = zlib.compress(content)
+    page = b'<< /Type /Page /Parent 2 0 R /Contents 4 0 R >>'
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        None if packed else page,
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(content), content),
+        b'<< ' + info + b' >>',
+    ]
+    if packed:
+        index = b'3 0 '
+        packed_data = zlib.compress(index + page)
+        objects.append(b'<< /Type /ObjStm /N 1 /First %d /Length %d /Filter /FlateDecode >>\n'
+                       b'stream\n%s\nendstream' % (len(index), len(packed_data), packed_data))
+    return serialize(objects, b'/Root 1 0 R /Info 5 0 R')
+
+
+def serialize(objects, trailer):
+    out = b'%PDF-1.5\n'
+    for number, body in enumerate(objects, 1):
+        if body is not None:
+            out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    return out + b'trailer\n<< ' + trailer + b' >>\n%%EOF\n'
+
+
+def stream(data):
+    return b'<< /Length %d >>\nstream\n%s\nendstream' % (len(data), data)
+
+
+class TestSniff(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, contents):
+        path = os.path.join(self.tmpdir.name, 'statement%d.pdf' % len(os.listdir(self.tmpdir.name)))
+        with open(path, 'wb') as f:
+            f.write(contents)
+        return path
+
+    def test_content_stream(self):
+        path = self.write(make_pdf(b'Fidelity Investments'))
+        self.assertEqual(pdfsniff.institutions(path), {'fidelity'})
+        self.assertTrue(pdfsniff.plausible(path, 'fidelity'))
+        self.assertFalse(pdfsniff.plausible(path, 'chase'))
+
+    def test_info(self):
+        path = self.write(make_pdf(b'Statement', info=b'/Title (Account) /Producer <FEFF00430068006100730065>'))
+        self.assertEqual(pdfsniff.sniff(path), b'Account\nChase\nStatement')
+        self.assertFalse(pdfsniff.plausible(path, 'transamerica'))
+
+    def test_object_stream(self):
+        path = self.write(make_pdf(b'TRANSAMERICA', packed=True))
+        self.assertEqual(pdfsniff.institutions(path), {'transamerica'})
+
+    def test_whole_words(self):
+        self.assertEqual(set(NOT_MARKERS), {m for markers in pdfsniff.MARKERS.values() for m in markers})
+        for marker, word in NOT_MARKERS.items():
+            with self.subTest(marker=marker):
+                path = self.write(make_pdf(b'Your ' + word + b' summary', info=b'/Title (' + word + b')'))
+                self.assertEqual(pdfsniff.institutions(path), set())
+                self.assertTrue(all(pdfsniff.plausible(path, name) for name in pdfsniff.MARKERS))
+                path = self.write(make_pdf(b'Your ' + marker + b', N.A. summary'))
+                self.assertEqual(len(pdfsniff.institutions(path)), 1)
+
+    def test_ambiguous(self):
+        path = self.write(make_pdf(b'Transfer from Fidelity', info=b'/Producer (Chase)'))
+        self.assertEqual(pdfsniff.institutions(path), {'chase', 'fidelity'})
+        self.assertTrue(pdfsniff.plausible(path, 'transamerica'))
+
+    def test_hex_strings(self):
+        # Glyph ids can't be read without the font: whatever the metadata
+        # says, the page might name anyone.
+        content = b'BT /F1 9 Tf 36 756 Td <00430068> Tj [<0061>-20<0073>] TJ ET'
+        path = self.write(make_pdf(b'', info=b'/Producer (Fidelity)', content=content))
+        self.assertEqual(pdfsniff.sniff(path), b'')
+        self.assertTrue(pdfsniff.plausible(path, 'chase'))
+
+    def test_first_page(self):
+        # The second page's content comes first in the file; the first page
+        # hangs below an intermediate node and has an indirect array of
+        # content streams.
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'<< /Type /Pages /Kids [3 0 R] /Count 2 >>',
+            b'<< /Type /Pages /Parent 2 0 R /Kids [5 0 R 4 0 R] /Count 2 >>',
+            b'<< /Type /Page /Parent 3 0 R /Contents 6 0 R >>',
+            b'<< /Type /Page /Parent 3 0 R /Contents 9 0 R >>',
+            stream(b'BT (Fidelity) Tj ET'),
+            stream(b'BT (Chase) Tj ET'),
+            stream(b'BT (Statement) Tj ET'),
+            b'[7 0 R 8 0 R]',
+        ]
+        path = self.write(serialize(objects, b'/Root 1 0 R'))
+        self.assertEqual(pdfsniff.sniff(path), b'Chase\nStatement')
+
+    def test_unknown_is_plausible(self):
+        for contents in (make_pdf(b'Hello world'), b'not a pdf', b''):
+            path = self.write(contents)
+            self.assertTrue(pdfsniff.plausible(path, 'chase'))
+
+
+if __name__ == '__main__':
+    unittest.main()
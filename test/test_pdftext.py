@@ -0,0 +1,155 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from beancount_utils import pdftext
+
+
+class FakeExtractor:
+    """Extractor over a list of page strings, counting pages extracted."""
+
+    def __init__(self, pages, version='1'):
+        self.pages = pages
+        self.name = 'fake'
+        self.cache = True
+        self.extracted = []
+        self._version = version
+
+    def version(self):
+        return self._version
+
+    def extract(self, filepath, indices):
+        count = len(self.pages)
+        indices = range(count) if indices is None else [i for i in indices if i < count]
+        self.extracted.extend(indices)
+        return count, {i: self.pages[i] for i in indices}
+
+
+def _chunk_extract(filepath, indices):
+    # Tags each page with the request it came in, to see how pages were
+    # split between processes. Module-level, so that it pickles.
+    with open(filepath) as f:
+        count = int(f.read())
+    indices = range(count) if indices is None else [i for i in indices if i < count]
+    return count, {i: (i, os.getpid(), tuple(indices)) for i in indices}
+
+
+CHUNK_EXTRACTOR = pdftext.Extractor('chunks', lambda: '1', _chunk_extract)
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pdf = os.path.join(self.tmpdir.name, 'statement.pdf')
+        with open(self.pdf, 'wb') as f:
+            f.write(b'%PDF-1.4 not really')
+        self.cache_dir = os.path.join(self.tmpdir.name, 'cache')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lazy_fill(self):
+        cache = pdftext.PageCache(self.cache_dir)
+        extractor = FakeExtractor(['one', 'two', 'three'])
+        self.assertEqual(cache.pages(self.pdf, extractor, [0]), ['one'])
+        self.assertEqual(cache.pages(self.pdf, extractor), ['one', 'two', 'three'])
+        self.assertEqual(cache.pages(self.pdf, extractor, [0, 5]), ['one'])
+        self.assertEqual(extractor.extracted, [0, 1, 2])
+
+    def test_persistent(self):
+        pdftext.PageCache(self.cache_dir).pages(self.pdf, FakeExtractor(['one', 'two']))
+        extractor = FakeExtractor(['one', 'two'])
+        self.assertEqual(pdftext.PageCache(self.cache_dir).pages(self.pdf, extractor), ['one', 'two'])
+        self.assertEqual(extractor.extracted, [])
+
+    def test_keyed_by_version_and_content(self):
+        pdftext.PageCache(self.cache_dir).pages(self.pdf, FakeExtractor(['old']))
+        extractor = FakeExtractor(['new'], version='2')
+        self.assertEqual(pdftext.PageCache(self.cache_dir).pages(self.pdf, extractor), ['new'])
+
+        with open(self.pdf, 'ab') as f:
+            f.write(b' changed')
+        extractor = FakeExtractor(['changed'])
+        self.assertEqual(pdftext.PageCache(self.cache_dir).pages(self.pdf, extractor), ['changed'])
+
+    def test_setup_cache(self):
+        # Nothing goes to disk unless asked for.
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.cache_dir}):
+            os.environ.pop('BEANCOUNT_UTILS_CACHE', None)
+            self.assertIsNone(pdftext.default_cache_dir())
+            self.assertTrue(pdftext.user_cache_dir().startswith(self.cache_dir))
+        try:
+            pdftext.setup_cache(self.cache_dir)
+            self.assertEqual(pdftext.get_pages(self.pdf, FakeExtractor(['one'])), ['one'])
+            self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        finally:
+            pdftext.setup_cache(None)
+
+
+class TestExtractPages(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pdf = os.path.join(self.tmpdir.name, 'statement.pdf')
+        with open(self.pdf, 'w') as f:
+            f.write('10')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def extract(self, indices, workers):
+        count, pages = pdftext.extract_pages(self.pdf, CHUNK_EXTRACTOR, indices, workers)
+        self.assertEqual(count, 10)
+        for i, (index, _, _) in pages.items():
+            self.assertEqual(i, index)
+        return pages
+
+    def test_parallel(self):
+        for indices, chunks in [
+                (None, [(0, 1, 2, 3, 4), (5, 6, 7, 8, 9)]),
+                ([1, 2, 3, 5, 8, 9], [(1, 2, 3), (5, 8, 9)]),
+                ([9, 2, 12, 4, 0], [(9, 2, 12), (4, 0)])]:
+            with self.subTest(indices=indices):
+                pages = self.extract(indices, 2)
+                wanted = range(10) if indices is None else [i for i in indices if i < 10]
+                self.assertEqual(sorted(pages), sorted(wanted))
+                # Each worker got a contiguous run of the request, in order.
+                self.assertEqual(sorted({request for _, _, request in pages.values()}),
+                                 sorted(tuple(i for i in chunk if i < 10) for chunk in chunks))
+                self.assertNotIn(os.getpid(), {pid for _, pid, _ in pages.values()})
+
+    def test_serial(self):
+        small = list(range(pdftext.PARALLEL_MIN_PAGES - 1))
+        for indices, workers in [(small, 4), ([7, 3], 2), (None, 1), ([4, 5, 6, 7, 8], None)]:
+            with self.subTest(indices=indices, workers=workers):
+                pages = self.extract(indices, workers)
+                wanted = list(range(10) if indices is None else indices)
+                self.assertEqual(sorted(pages), sorted(wanted))
+                # One request, in this process.
+                self.assertEqual({(pid, request) for _, pid, request in pages.values()},
+                                 {(os.getpid(), tuple(wanted))})
+
+
+class TestBackends(unittest.TestCase):
+    def test_lookup(self):
+        self.assertIs(pdftext.backend('pypdf'), pdftext.PYPDF)
+        with self.assertRaises(ValueError):
+            pdftext.backend('ocr')
+
+    def test_accepts(self):
+        self.assertTrue(pdftext.accepts('a.pdf', 'application/pdf', 'pypdf'))
+        self.assertFalse(pdftext.accepts('a.pdf.pages.txt', 'text/plain', 'pdfplumber'))
+        self.assertTrue(pdftext.accepts('a.pdf.pages.txt', 'text/plain', 'replay'))
+        self.assertFalse(pdftext.accepts('a.pdf', 'application/pdf', 'replay'))
+
+    def test_register(self):
+        extractor = FakeExtractor(['page'])
+        pdftext.register_backend(extractor)
+        try:
+            self.assertIs(pdftext.backend('fake'), extractor)
+        finally:
+            del pdftext.BACKENDS['fake']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from beancount_utils.importers import simplefin, singlefin
+
+
+def make_dump(accounts):
+    return {
+        'errors': [],
+        'accounts': [
+            {'id': account_id, 'name': f'Account {account_id}', 'org': {'name': 'Bank'},
+             'transactions': [
+                 {'id': f'{account_id}-{i}', 'posted': 1700000000 + 86400 * i, 'amount': f'-{i}.50',
+                  'description': f'PAYMENT   {i}'}
+                 for i in range(1, 4)
+             ]}
+            for account_id in accounts
+        ],
+    }
+
+
+class TestSharedDocument(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, 'simplefin.json')
+        self.write(make_dump(['ACT-1', 'ACT-2', 'ACT-3']))
+        simplefin.load_document.cache_clear()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, data):
+        with open(self.filepath, 'w') as f:
+            json.dump(data, f)
+
+    def test_parsed_once(self):
+        importers = [singlefin.Importer(f'Assets:Bank:{i}', f'ACT-{i}') for i in (1, 2, 3, 4)]
+        both = simplefin.Importer({'ACT-1': 'Assets:Bank:1', 'ACT-3': 'Assets:Bank:3'})
+        with mock.patch.object(simplefin.jsonload, 'load', wraps=simplefin.jsonload.load) as load:
+            extracted = [importer.extract(self.filepath, []) for importer in importers]
+            combined = both.extract(self.filepath, [])
+        self.assertEqual(load.call_count, 1)
+
+        self.assertEqual([len(entries) for entries in extracted], [3, 3, 3, 0])
+        self.assertEqual(extracted[1][0].postings[0].account, 'Assets:Bank:2')
+        self.assertEqual(extracted[1][0].postings[0].units.number, Decimal('-1.50'))
+        self.assertEqual(extracted[1][0].narration, 'PAYMENT 1')
+        self.assertEqual(len(combined), 6)
+
+    def test_modified_file(self):
+        importer = singlefin.Importer('Assets:Bank:4', 'ACT-4')
+        self.assertEqual(importer.extract(self.filepath, []), [])
+        self.write(make_dump(['ACT-4']))
+        self.assertEqual(len(importer.extract(self.filepath, [])), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import datetime
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from beancount_utils import pdftext
+from beancount_utils.importers import transamerica_pdf
+
+
+def make_pdf(pages):
+    """A PDF with one page per list of lines."""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for lines in pages:
+        stream = b'BT /F1 9 Tf 12 TL 36 756 Td\n' + b''.join(
+            b'(%s) Tj T*\n' % line.encode() for line in lines) + b'ET'
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects))
+        kids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % k for k in kids), len(kids))
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    return out + b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+
+
+HEADING = 'Source Beginning Balance Money In Money Out Transfers Credits/Fees Gain/Loss Ending Balance Vested %'
+
+PAGES = [
+    ['Transamerica Retirement Solutions', 'January 1, 2024 - March 31, 2024', 'Account Summary'],
+    ['Plan 1', HEADING,
+     'Employee Deferral $1,000.00 $500.00 $0.00 $0.00 -$1.25 $24.50 $1,523.25 100.0%',
+     'Totals $1,000.00 $500.00 $0.00 $0.00 -$1.25 $24.50 $1,523.25'],
+    ['Investment Detail', '01/15/2024 Fund A Contribution 12.3456 units at $40.5000 $500.00'],
+    ['Plan 2', HEADING,
+     'Employer Match $200.00 $0.00 $0.00 $0.00 $0.00 -$3.00 $197.00 50.0%',
+     'Totals $200.00 $0.00 $0.00 $0.00 $0.00 -$3.00 $197.00'],
+]
+
+SOURCES = {
+    'Employee Deferral': 'Assets:Retirement:Deferral',
+    'Employer Match': 'Assets:Retirement:Match',
+}
+
+
+def setUpModule():
+    # Keep extracted text in memory, whatever the environment says.
+    pdftext.setup_cache(None)
+
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pdf = os.path.join(self.tmpdir.name, 'statement.pdf')
+        with open(self.pdf, 'wb') as f:
+            f.write(make_pdf(PAGES))
+        self.importer = transamerica_pdf.Importer(SOURCES)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assertEntries(self, entries):
+        fees, pnl, *balances = entries
+        self.assertEqual(fees.date, datetime.date(2024, 3, 31))
+        self.assertEqual([p.units.number for p in fees.postings],
+                         [Decimal('1.25'), Decimal('-1.25'), Decimal('0.00'), Decimal('0.00')])
+        self.assertEqual([p.units.number for p in pnl.postings],
+                         [Decimal('-24.50'), Decimal('24.50'), Decimal('3.00'), Decimal('-3.00')])
+        self.assertEqual([(b.date, b.account, b.amount.number) for b in balances], [
+            (datetime.date(2024, 4, 1), 'Assets:Retirement:Deferral', Decimal('1523.25')),
+            (datetime.date(2024, 4, 1), 'Assets:Retirement:Match', Decimal('197.00')),
+        ])
+
+    def test_find_table_pages(self):
+        self.assertEqual(transamerica_pdf.find_table_pages(self.pdf), [1, 3])
+
+    def test_extract(self):
+        self.assertTrue(self.importer.identify(self.pdf))
+        with mock.patch.object(transamerica_pdf, 'pdf_to_pages', wraps=transamerica_pdf.pdf_to_pages) as all_pages:
+            self.assertEntries(self.importer.extract(self.pdf, []))
+        self.assertEqual(all_pages.call_count, 0)
+
+    def test_fallback(self):
+        # The quick pass missed a table, or saw one layout extraction
+        # doesn't: every page is extracted.
+        for table_pages in ([1], [1, 2], [1, 2, 3], [3]):
+            with self.subTest(table_pages=table_pages), \
+                    mock.patch.object(transamerica_pdf, 'find_table_pages', return_value=table_pages), \
+                    mock.patch.object(transamerica_pdf, 'pdf_to_pages', wraps=transamerica_pdf.pdf_to_pages) as all_pages:
+                self.assertEntries(self.importer.extract(self.pdf, []))
+                self.assertEqual(all_pages.call_count, 1)
+
+    def test_missed_table_page(self):
+        # The second plan repeats a source, whose last row wins; the quick
+        # pass missing its page mustn't drop it.
+        pages = [PAGES[0],
+                 PAGES[1][:3] + ['Employer Match $200.00 $0.00 $0.00 $0.00 $0.00 -$3.00 $197.00 50.0%'] + PAGES[1][3:],
+                 PAGES[2],
+                 ['Plan 2', HEADING,
+                  'Employee Deferral $10.00 $0.00 $0.00 $0.00 -$0.50 $1.00 $10.50 100.0%',
+                  'Totals $10.00 $0.00 $0.00 $0.00 -$0.50 $1.00 $10.50']]
+        with open(self.pdf, 'wb') as f:
+            f.write(make_pdf(pages))
+        with mock.patch.object(transamerica_pdf, 'find_table_pages', return_value=[1]):
+            entries = self.importer.extract(self.pdf, [])
+        self.assertEqual([(b.account, b.amount.number) for b in entries[2:]], [
+            ('Assets:Retirement:Deferral', Decimal('10.50')),
+            ('Assets:Retirement:Match', Decimal('197.00')),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
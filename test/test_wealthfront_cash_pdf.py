@@ -0,0 +1,108 @@
+import datetime
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from beancount_utils import pdftext
+from beancount_utils.decorator import Decorator
+from beancount_utils.importers import wealthfront_cash_pdf
+
+
+def make_pdf(pages):
+    """A PDF with one page per list of (font size, line) pairs."""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for lines in pages:
+        stream = b'BT 36 756 Td\n' + b''.join(
+            b'/F1 %s Tf %s TL (%s) Tj T*\n' % (size.encode(), size.encode(), line.encode())
+            for size, line in lines) + b'ET'
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects))
+        kids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % k for k in kids), len(kids))
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    return out + b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+
+
+BODY = '9.38'
+PAGES = [
+    [('14', 'Wealthfront Cash Account Statement'),
+     (BODY, '01/02/2024 PAYROLL ACME'), (BODY, 'Deposit+ $1,000.00'),
+     (BODY, '01/03/2024 End of Day Settlement'), (BODY, 'Debit- $5.00'),
+     (BODY, '01/05/2024 RENT')],
+    # The last transaction's amount is on the next page, below a footer.
+    [('8', 'Page 2'), (BODY, 'Debit- $1,200.00')],
+]
+
+
+def setUpModule():
+    # Keep extracted text in memory, whatever the environment says.
+    pdftext.setup_cache(None)
+
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pdf = os.path.join(self.tmpdir.name, 'statement.pdf')
+        with open(self.pdf, 'wb') as f:
+            f.write(make_pdf(PAGES))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_extract(self):
+        decorator = Decorator.from_list([{'re': 'rent', 'target_account': 'Expenses:Rent'}])
+        importer = wealthfront_cash_pdf.Importer(decorator=decorator)
+        self.assertTrue(importer.identify(self.pdf))
+        entries = importer.extract(self.pdf, [])
+        importer.deduplicate(entries, [])
+
+        self.assertEqual([(e.date, e.payee, e.postings[0].units.number) for e in entries], [
+            (datetime.date(2024, 1, 2), 'PAYROLL ACME', Decimal('1000.00')),
+            (datetime.date(2024, 1, 5), 'RENT', Decimal('-1200.00')),
+        ])
+        self.assertTrue(entries[0].postings[0].meta['import_id'].startswith('wealthfront-'))
+        self.assertEqual(entries[1].postings[1].account, 'Expenses:Rent')
+
+    def test_identify_fixture(self):
+        fixture = os.path.join(self.tmpdir.name, 'other.pdf.pages.txt')
+        pdftext.write_fixture(fixture, ['Wealthfront Cash Account Statement'])
+        self.assertTrue(wealthfront_cash_pdf.Importer(text_backend='replay').identify(fixture))
+        # Fixtures are only read when asked for, and never next to a PDF.
+        self.assertFalse(wealthfront_cash_pdf.Importer().identify(fixture))
+        self.assertFalse(wealthfront_cash_pdf.Importer(text_backend='replay').identify(self.pdf))
+
+    def test_payables(self):
+        # As in the original converter, the last matching payable wins.
+        decorator = wealthfront_cash_pdf.payables_decorator([
+            {'re': '.', 'narration': 'Anything'},
+            {'re': 'rent', 'payee': 'Landlord', 'expense_account': 'Expenses:Rent', 'tags': ['home']},
+        ])
+        importer = wealthfront_cash_pdf.Importer(decorator=decorator)
+        entries = importer.extract(self.pdf, [])
+        importer.deduplicate(entries, [])
+        self.assertEqual([(e.payee, e.narration) for e in entries], [('PAYROLL ACME', 'Anything'), ('Landlord', '')])
+        self.assertEqual(entries[1].tags, {'home'})
+        self.assertEqual(entries[1].postings[1].account, 'Expenses:Rent')
+
+    def test_duplicates(self):
+        importer = wealthfront_cash_pdf.Importer()
+        existing = importer.extract(self.pdf, [])
+        entries = importer.extract(self.pdf, [])
+        importer.deduplicate(entries, existing)
+        self.assertTrue(all(e.meta.get('__duplicate__') for e in entries))
+
+
+if __name__ == '__main__':
+    unittest.main()